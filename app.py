@@ -1,9 +1,19 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, make_response
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, make_response
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from apscheduler.schedulers.background import BackgroundScheduler
 from vatsim_fetcher import VatsimFetcher
+from fetch_pipeline import FetchPipeline
+from cycle_metrics import CycleMetrics, TimedJson
+from board_delta import BoardDeltas
+from payload_cache import PayloadCache
+import compact_board
+from cluster import make_cluster
+from feed_recorder import FeedRecorder, FeedReplayer
 from airport_languages import AirportLanguages
 from config import Config
+from http_client import client as http
+from stand_store import read_shard, write_shard
+from osm_stand_cache import OsmStandCache
 import route_parser
 import json
 import math
@@ -14,7 +24,6 @@ import time
 import uuid
 from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
-import requests
 import psycopg2
 
 def _haversine_km(lat1, lon1, lat2, lon2):
@@ -26,15 +35,38 @@ def _haversine_km(lat1, lon1, lat2, lon2):
 
 app = Flask(__name__)
 app.config.from_object(Config)
-socketio = SocketIO(app, cors_allowed_origins="*")
+cycle_metrics = CycleMetrics()
+# Packet encoding goes through TimedJson so it shows up as the 'serialization' stage.
+# With a message queue, rooms are shared by every worker process.
+socketio = SocketIO(app, cors_allowed_origins="*", json=TimedJson(cycle_metrics, json),
+                    message_queue=Config.MESSAGE_QUEUE_URL or None)
+# Decides which worker runs the fetch/update cycle when there are several
+cluster = make_cluster(Config.MESSAGE_QUEUE_URL, Config.CLUSTER_STATE_DIR, Config.LEADER_TTL)
 
 flight_fetcher = VatsimFetcher()
+flight_fetcher.metrics = cycle_metrics
+flight_fetcher.stream_feed = Config.VATSIM_STREAM_FEED
+if Config.VATSIM_REPLAY_DIR:
+    flight_fetcher.enable_replay(FeedReplayer(Config.VATSIM_REPLAY_DIR, speed=Config.VATSIM_REPLAY_SPEED, loop=True))
+    print(f"Replaying VATSIM snapshots from {Config.VATSIM_REPLAY_DIR} at {Config.VATSIM_REPLAY_SPEED}x")
+elif Config.VATSIM_RECORD_DIR:
+    flight_fetcher.recorder = FeedRecorder(Config.VATSIM_RECORD_DIR)
+    print(f"Recording VATSIM snapshots to {Config.VATSIM_RECORD_DIR}")
+fetch_pipeline = FetchPipeline(deadline=Config.FETCH_DEADLINE, metrics=cycle_metrics)
 # Global store: {'LSZH': {...}, 'LSGG': {...}, 'EDDF': {...}, etc}
 current_data = {}
+# Last board sent to each room; rooms get deltas against it
+board_deltas = BoardDeltas()
+# Encoded payloads, reused until the airport's board changes
+payload_cache = PayloadCache(metrics=cycle_metrics)
 
 # Track active airport rooms so dynamic airports can be refreshed
 active_airport_counts = {}
 client_airports = {}
+# Wire encoding each client asked for, and how many clients are in each airport/encoding room
+client_encodings = {}
+room_counts = {}
+ENCODINGS = ('json', compact_board.ENCODING)
 
 # VATSIM events cache (refreshed every 15 minutes)
 _events_cache = {'data': [], 'fetched_at': 0}
@@ -46,7 +78,7 @@ def fetch_vatsim_events():
     if now - _events_cache['fetched_at'] < EVENTS_CACHE_TTL:
         return _events_cache['data']
     try:
-        resp = requests.get('https://vatsim.net/api/events', timeout=8)
+        resp = http.get('https://vatsim.net/api/events')
         resp.raise_for_status()
         _events_cache['data'] = resp.json()
         _events_cache['fetched_at'] = now
@@ -55,14 +87,24 @@ def fetch_vatsim_events():
     return _events_cache['data']
 
 THEME_MAP_PATH = os.path.join(app.static_folder, 'data', 'theme_map.json')
-STANDS_PATH = os.path.join(app.static_folder, 'stands.json')
+STANDS_DIR = os.path.join(app.static_folder, 'stands')
 CUSTOM_AIRPORTS_PATH = os.path.join(app.root_path, 'data', 'custom_airports.json')
+OSM_STANDS_CACHE_DIR = os.path.join(app.root_path, 'data', 'osm_stands')
 THEME_CSS_PREFIX = '/static/css/themes/'
 ICAO_PATTERN = re.compile(r'^[A-Z]{4}$')
 ADMIN_SESSION_KEY = 'admin_authenticated'
 FAILED_LOGIN_ATTEMPTS = {}
 LOGIN_LOCKOUTS = {}
 
+# OSM stands for airports without manual stand files, cached on disk
+osm_stand_cache = OsmStandCache(
+    OSM_STANDS_CACHE_DIR,
+    flight_fetcher.fetch_osm_stands_live,
+    ttl=Config.OSM_STANDS_TTL_HOURS * 3600,
+    negative_ttl=Config.OSM_STANDS_NEGATIVE_TTL_HOURS * 3600,
+)
+osm_airports = set()  # ICAOs whose live stands came from OSM
+
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
 MAX_TRACKED_VISITORS = 20000
@@ -339,23 +381,6 @@ def _write_json(path, payload):
         json.dump(payload, f, indent=2, ensure_ascii=True)
         f.write('\n')
 
-def _write_stands_json(path, data):
-    """Write stands.json with one stand object per line for easy manual review."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    lines = ["{"]
-    airports = list(data.keys())
-    for i, icao in enumerate(airports):
-        stands = data[icao]
-        comma = "," if i < len(airports) - 1 else ""
-        lines.append(f'  "{icao}": [')
-        for j, stand in enumerate(stands):
-            sc = "," if j < len(stands) - 1 else ""
-            lines.append(f'    {json.dumps(stand, ensure_ascii=True)}{sc}')
-        lines.append(f'  ]{comma}')
-    lines.append("}")
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(lines) + "\n")
-
 
 def _normalize_icao(code):
     code = str(code or '').strip().upper()
@@ -565,32 +590,229 @@ def _decrement_airport(airport):
     else:
         active_airport_counts[airport] = count - 1
 
+def _room(airport, encoding):
+    """Socket.IO room for airport's viewers using encoding (plain JSON keeps the bare ICAO)"""
+    return airport if encoding == 'json' else f'{airport}:{encoding}'
+
+def _join_airport_room(airport, encoding):
+    join_room(_room(airport, encoding))
+    client_airports[request.sid] = airport
+    client_encodings[request.sid] = encoding
+    _increment_airport(airport)
+    room = _room(airport, encoding)
+    room_counts[room] = room_counts.get(room, 0) + 1
+    if cluster.shared and not cluster.is_leader:
+        # Let the leader know straight away so it starts encoding for this room
+        cluster.report_counts(active_airport_counts, room_counts)
+
+def _leave_airport_room(airport):
+    encoding = client_encodings.pop(request.sid, 'json')
+    leave_room(_room(airport, encoding))
+    _decrement_airport(airport)
+    room = _room(airport, encoding)
+    count = room_counts.get(room, 0)
+    if count <= 1:
+        room_counts.pop(room, None)
+    else:
+        room_counts[room] = count - 1
+
+def _fetch_tasks(airport_codes):
+    """Upstream fetches for one update cycle, keyed by name for FetchPipeline."""
+    return {
+        'vatsim': flight_fetcher.refresh_snapshot,
+        'metar': lambda: flight_fetcher.metar_fetcher.refresh(airport_codes),
+        'events': fetch_vatsim_events,
+    }
+
+def _publish_boards(boards, skip_sid=None):
+    """
+    Store freshly built boards and send each room what changed since its last board.
+    skip_sid: client left out of the broadcast (it gets a snapshot instead)
+    """
+    current_data.update(boards)
+    # Members on every worker count, since the queue fans each emit out to all of them
+    rooms = cluster.room_counts(room_counts)
+    for airport_code, airport_data in boards.items():
+        message = board_deltas.update(airport_code, airport_data)
+        if not message:
+            continue
+        event, payload = message
+        for encoding in ENCODINGS:
+            # Compact variants are only encoded for airports that have such viewers
+            if encoding != 'json' and not rooms.get(_room(airport_code, encoding)):
+                continue
+            if event == 'flight_update':
+                data = _snapshot_bytes(airport_code, encoding, payload)
+            elif encoding == compact_board.ENCODING:
+                data = payload_cache.encode(compact_board.compact_delta(payload))
+            else:
+                data = payload_cache.encode(payload)
+            # Sent as binary so the JSON is only encoded once
+            socketio.emit(event, data, to=_room(airport_code, encoding), skip_sid=skip_sid)
+    if cluster.shared:
+        cluster.publish(_shared_state())
+
+def _shared_state():
+    """Returns: what follower workers need to serve sockets and REST without fetching"""
+    return {
+        'boards': current_data,
+        'seq': board_deltas.seq,
+        'occupancy': flight_fetcher.occupancy,
+        'controllers': flight_fetcher.all_controllers,
+        'pilots': flight_fetcher.all_pilots,
+    }
+
+def _follow_leader():
+    """On a follower worker, pick up the boards the leader last published"""
+    state = cluster.load()
+    if state is None:
+        return
+    for code in [code for code in current_data if code not in state['boards']]:
+        current_data.pop(code, None)
+    current_data.update(state['boards'])
+    board_deltas.load(state['boards'], state['seq'])
+    flight_fetcher.occupancy = {code: tuple(entry) for code, entry in state['occupancy'].items()}
+    flight_fetcher.all_controllers = state['controllers']
+    flight_fetcher.all_pilots = state['pilots']
+
+def _cluster_tick():
+    """Renew or take over leadership, share this worker's room counts and follow the leader"""
+    cluster.elect()
+    cluster.report_counts(active_airport_counts, room_counts)
+    if cluster.is_leader:
+        _apply_stand_updates()
+    else:
+        _follow_leader()
+
+def _share_stands(icao, stands, source, name=None):
+    """On a follower, pass a stand change on to the leader, which builds every board"""
+    if cluster.shared and not cluster.is_leader:
+        cluster.send_stands({'icao': icao, 'stands': stands, 'source': source, 'name': name})
+
+def _apply_stand_updates():
+    """On the leader, install stand changes (admin edits, OSM results) made on other workers"""
+    for update in cluster.take_stand_updates():
+        icao = update['icao']
+        if update['source'] == 'osm':
+            _install_osm_stands(icao, update['stands'], update['name'])
+        else:
+            flight_fetcher.set_airport_stands(icao, update['stands'])
+            osm_airports.discard(icao)
+        print(f"Cluster: applied {update['source']} stands for {icao} from another worker")
+
+def _timed_job(name, func):
+    """Wrap a scheduler job so its run time shows up under 'jobs' in the admin metrics"""
+    def run():
+        with cycle_metrics.job(name):
+            return func()
+    return run
+
+def _leader_job(func):
+    """Wrap a scheduler job so only the elected fetcher process runs it"""
+    def run():
+        if cluster.is_leader:
+            return func()
+    return run
+
+def _board_version(airport):
+    """Returns: the version of airport's board (its delta sequence number), or None"""
+    return board_deltas.seq.get(airport)
+
+def _snapshot_bytes(airport, encoding, payload=None):
+    """Returns: airport's full board encoded for encoding, cached per board version, or None"""
+    def build():
+        snapshot = payload or board_deltas.snapshot(airport)
+        if snapshot is not None and encoding == compact_board.ENCODING:
+            snapshot = compact_board.compact_snapshot(snapshot)
+        return snapshot
+
+    version = payload['seq'] if payload else _board_version(airport)
+    return payload_cache.get(('board', airport, encoding), version, build)
+
+def _boards_due(airport_infos, viewers):
+    """
+    Returns: the airports to rebuild this cycle. Airports with viewers are
+    rebuilt every cycle, the rest every IDLE_BOARD_INTERVAL seconds.
+    """
+    now = time.time()
+    due = {}
+    for code, info in airport_infos.items():
+        built = flight_fetcher.board_built.get(code)
+        if viewers.get(code) or built is None or now - built[1] >= Config.IDLE_BOARD_INTERVAL:
+            due[code] = info
+    return due
+
+def _board_is_current(airport):
+    """True if airport's board was built from the latest VATSIM snapshot"""
+    built = flight_fetcher.board_built.get(airport)
+    snapshot = flight_fetcher.snapshot
+    return built is not None and snapshot is not None and built[0] == snapshot['version']
+
 def update_flights():
     """Fetch all configured airports and broadcast to their respective rooms"""
-    global current_data
-    print("Fetching flight data...")
-    new_data = flight_fetcher.fetch_flights()
-
-    # Refresh any active dynamic airports (not in configured list)
+    if not cluster.is_leader:
+        return
+    cycle_metrics.start_cycle()
+    status = 'error'
+    try:
+        status = _run_update_cycle()
+    finally:
+        cycle = cycle_metrics.end_cycle(status)
+        if cycle and status == 'ok':
+            stages = ', '.join(f"{name} {ms:.0f}ms" for name, ms in cycle['stages'].items())
+            print(f"Update cycle {cycle['total_ms']:.0f}ms ({stages})")
+
+def _run_update_cycle():
+    """One update cycle. Returns: 'ok', or 'skipped' when the feed had not changed."""
+    # Active dynamic airports (not in configured list) are built from the
+    # same feed download as the configured hubs. Viewers on every worker count.
+    viewers = cluster.viewer_counts(active_airport_counts)
     dynamic_airports = [
-        code for code in active_airport_counts.keys()
+        code for code in list(viewers.keys())
         if code not in flight_fetcher.configured_airports
     ]
-    for code in dynamic_airports:
-        airport_data = flight_fetcher.fetch_single_airport(code)
-        if airport_data:
-            new_data.update(airport_data)
+    airport_infos = flight_fetcher.resolve_airports(dynamic_airports)
+    # Unwatched airports are left to the slower idle cadence (or rebuilt
+    # when someone joins), METARs included
+    due = _boards_due(airport_infos, viewers)
+
+    # Feed, METAR and events run concurrently; whatever misses the
+    # deadline keeps its last cached value. UKCP refreshes on its own job.
+    with cycle_metrics.stage('fetch'):
+        fetch_pipeline.run(_fetch_tasks(list(due.keys())))
+    if not flight_fetcher.has_new_snapshot():
+        print("No new VATSIM snapshot, skipping update")
+        return 'skipped'
+
+    with cycle_metrics.stage('boards'):
+        new_data = flight_fetcher.build_boards(due, retained=[c for c in airport_infos if c not in due])
 
     if new_data:
-        current_data.update(new_data)
-        # Broadcast specifically to subscribers of each airport
-        for airport_code, airport_data in new_data.items():
-            socketio.emit('flight_update', airport_data, to=airport_code)
+        # Broadcast specifically to subscribers of each airport; airports
+        # whose board didn't change send nothing
+        with cycle_metrics.stage('emit'):
+            _publish_boards(new_data)
+    return 'ok'
 
+cluster.elect()
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=update_flights, trigger="interval", seconds=Config.UPDATE_INTERVAL)
+if cluster.shared:
+    scheduler.add_job(func=_cluster_tick, trigger="interval", seconds=Config.CLUSTER_SYNC_INTERVAL)
+if flight_fetcher.ukcp_fetcher:
+    # Stand assignments refresh independently; boards read whatever was last fetched
+    scheduler.add_job(func=_leader_job(_timed_job('ukcp', flight_fetcher.ukcp_fetcher.refresh)), trigger="interval",
+                      seconds=Config.UKCP_REFRESH_INTERVAL, next_run_time=datetime.now())
+    # Stand ID -> name mapping: pulled from UKCP, or hot-reloaded if the file is edited
+    flight_fetcher.ukcp_mapping.url = Config.UKCP_STANDS_URL or None
+    scheduler.add_job(func=_leader_job(flight_fetcher.ukcp_mapping.refresh), trigger="interval",
+                      seconds=Config.UKCP_STANDS_REFRESH_HOURS * 3600, next_run_time=datetime.now())
+    scheduler.add_job(func=_leader_job(flight_fetcher.ukcp_mapping.reload_if_changed), trigger="interval",
+                      seconds=Config.UKCP_REFRESH_INTERVAL)
 scheduler.start()
 atexit.register(lambda: scheduler.shutdown())
+atexit.register(fetch_pipeline.shutdown)
+atexit.register(osm_stand_cache.shutdown)
 
 if DATABASE_URL:
     try:
@@ -599,8 +821,10 @@ if DATABASE_URL:
     except Exception as _db_init_err:
         app.logger.error(f'_init_db() failed: {_db_init_err}. Traffic stats will be unavailable until DB is reachable.')
 
-# Fetch immediately on start
+# Fetch immediately on start (followers load the leader's boards instead)
 update_flights()
+if not cluster.is_leader:
+    _follow_leader()
 
 @app.route('/')
 def index():
@@ -693,16 +917,36 @@ def api_map(icao):
     normalized = _normalize_icao(icao)
     if not normalized:
         return jsonify({'error': 'Invalid ICAO'}), 400
-    data = current_data.get(normalized, {})
-    departures = data.get('departures', [])
-    arrivals = data.get('arrivals', [])
-    flights = [f for f in departures + arrivals if f.get('latitude') is not None]
-    return jsonify({
-        'airport': normalized,
-        'airport_name': data.get('airport_name', normalized),
-        'flights': flights,
-        'controllers': data.get('controllers', []),
-    })
+
+    def build():
+        data = current_data.get(normalized, {})
+        departures = data.get('departures', [])
+        arrivals = data.get('arrivals', [])
+        flights = [f for f in departures + arrivals if f.get('latitude') is not None]
+        return {
+            'airport': normalized,
+            'airport_name': data.get('airport_name', normalized),
+            'flights': flights,
+            'controllers': data.get('controllers', []),
+        }
+
+    key, version = ('map', normalized), _board_version(normalized)
+    if version is None:
+        return jsonify(build())
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resp = Response(payload_cache.get_gzip(key, version, build), mimetype='application/json')
+        resp.headers['Content-Encoding'] = 'gzip'
+    else:
+        resp = Response(payload_cache.get(key, version, build), mimetype='application/json')
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+@app.route('/api/stands/<icao>/occupancy')
+def api_stand_occupancy(icao):
+    normalized = _normalize_icao(icao)
+    if not normalized:
+        return jsonify({'error': 'Invalid ICAO'}), 400
+    return jsonify(flight_fetcher.stand_occupancy(normalized))
 
 @app.route('/api/controllers')
 def api_all_controllers():
@@ -814,7 +1058,7 @@ def logo_proxy(code):
     if not code:
         return '', 400
     try:
-        r = requests.get(f'https://images.kiwi.com/airlines/128/{code}.png', timeout=5)
+        r = http.get(f'https://images.kiwi.com/airlines/128/{code}.png')
         if r.status_code != 200:
             return '', 404
         resp = make_response(r.content)
@@ -860,14 +1104,10 @@ def admin_stands(icao):
     if not normalized_icao:
         return jsonify({'error': 'Invalid ICAO code'}), 400
 
-    all_stands = _read_json(STANDS_PATH, {})
-    if not isinstance(all_stands, dict):
-        all_stands = {}
-
     if request.method == 'GET':
         return jsonify({
             'icao': normalized_icao,
-            'stands': all_stands.get(normalized_icao, [])
+            'stands': read_shard(STANDS_DIR, normalized_icao)
         })
 
     payload = request.json or {}
@@ -877,9 +1117,11 @@ def admin_stands(icao):
 
     try:
         validated = _validate_stands(incoming)
-        all_stands[normalized_icao] = validated
-        _write_stands_json(STANDS_PATH, all_stands)
-        flight_fetcher.stands = flight_fetcher.load_stands()
+        # Only this airport's file and in-memory stands/index are replaced
+        write_shard(STANDS_DIR, normalized_icao, validated)
+        flight_fetcher.set_airport_stands(normalized_icao, validated)
+        osm_airports.discard(normalized_icao)
+        _share_stands(normalized_icao, validated, 'admin')
         return jsonify({
             'success': True,
             'icao': normalized_icao,
@@ -894,6 +1136,29 @@ def admin_traffic_stats():
     return jsonify(_get_traffic_summary())
 
 
+@app.route('/api/admin/metrics')
+def admin_metrics():
+    return jsonify({**cycle_metrics.summary(), 'payloads': payload_cache.stats()})
+
+
+@app.route('/api/admin/feed_stats')
+def admin_feed_stats():
+    stats = {**flight_fetcher.feed_stats, 'fetch_tasks': fetch_pipeline.stats}
+    ukcp = flight_fetcher.ukcp_fetcher
+    if ukcp:
+        stats['ukcp'] = {
+            'assignments': len(ukcp.cache),
+            'last_fetch': ukcp.last_fetch.isoformat() + 'Z' if ukcp.last_fetch else None,
+            'last_error': ukcp.last_error,
+        }
+    return jsonify(stats)
+
+
+@app.route('/api/admin/http_stats')
+def admin_http_stats():
+    return jsonify(http.host_stats())
+
+
 def _validate_custom_airports(payload):
     if not isinstance(payload, dict):
         raise ValueError('Custom airports must be an object keyed by ICAO code.')
@@ -949,6 +1214,27 @@ def admin_custom_airports():
     except ValueError as exc:
         return jsonify({'error': str(exc)}), 400
 
+def _install_osm_stands(icao, stands, name):
+    """Make OSM stands live for find_stand() and mark the airport as having stands."""
+    if not stands:
+        print(f"[SEARCH] OSM fetch returned no stands for {icao}")
+        return
+    # Manual stand data saved in the meantime wins over OSM
+    if icao in flight_fetcher.stands and icao not in osm_airports:
+        return
+    flight_fetcher.set_airport_stands(icao, stands)
+    osm_airports.add(icao)
+    print(f"[SEARCH] Loaded {len(stands)} OSM stands for {icao}")
+    _share_stands(icao, stands, 'osm', name)
+
+    # Ensure the board knows this airport now has stand data
+    if icao not in flight_fetcher.configured_airports:
+        flight_fetcher.configured_airports[icao] = {
+            'has_stands': True,
+            'name': name,
+        }
+        print(f"[SEARCH] Updated configured_airports[{icao}] with has_stands=True, name={name}")
+
 @app.route('/api/search_airport', methods=['POST'])
 def search_airport():
     """Search for a dynamic airport by ICAO code and fetch its data"""
@@ -970,35 +1256,36 @@ def search_airport():
         return jsonify({'error': f'Airport {icao} has no coordinate data'}), 400
     
     # --- NEW FALLBACK LOGIC ---
-    # Only hit OSM if we don't already have manual data in stands.json
+    # Only use OSM if we don't already have manual stand data. Cached results
+    # are used straight away; missing or expired ones are fetched in the
+    # background and show up on the next update.
     if icao not in flight_fetcher.stands:
-        print(f"[SEARCH] {icao} not in stands.json, attempting OSM fetch...")
-        dynamic_stands = flight_fetcher.fetch_osm_stands_live(icao)
-        if dynamic_stands:
-            print(f"[SEARCH] Successfully fetched {len(dynamic_stands)} stands from OSM for {icao}")
-            # Add to memory so find_stand() can use it immediately
-            flight_fetcher.stands[icao] = dynamic_stands
-            
-            # Ensure the board knows this airport now has stand data
-            if icao not in flight_fetcher.configured_airports:
-                flight_fetcher.configured_airports[icao] = {
-                    'has_stands': True,
-                    'name': airport_info.get('name', icao),
-                }
-                print(f"[SEARCH] Updated configured_airports[{icao}] with has_stands=True, name={airport_info.get('name', icao)}")
-        else:
-            print(f"[SEARCH] OSM fetch returned no stands for {icao}")
+        cached_stands, fresh = osm_stand_cache.lookup(icao)
+        if cached_stands:
+            print(f"[SEARCH] Using {len(cached_stands)} cached OSM stands for {icao}")
+            _install_osm_stands(icao, cached_stands, airport_info.get('name', icao))
+        elif cached_stands is not None and fresh:
+            print(f"[SEARCH] OSM has no stands for {icao} (cached)")
+        if not fresh and osm_stand_cache.request(icao, lambda code, stands: _install_osm_stands(code, stands, airport_info.get('name', code))):
+            print(f"[SEARCH] {icao} queued for background OSM stand fetch")
     else:
-        print(f"[SEARCH] {icao} already in stands.json, skipping OSM fetch")
+        print(f"[SEARCH] {icao} already has stand data, skipping OSM fetch")
     # ---------------------------
     
-    # Fetch data for this specific airport
-    print(f"[SEARCH] Fetching flight data for {icao}")
-    airport_data = flight_fetcher.fetch_single_airport(icao)
+    # Build this airport's board from the latest VATSIM snapshot. Followers
+    # have no snapshot: they answer with whatever board the leader last
+    # shared (possibly none yet), and the client's join_airport registers
+    # the viewer so the leader builds it on its next cycle.
+    print(f"[SEARCH] Building flight data for {icao}")
+    if cluster.is_leader:
+        airport_data = flight_fetcher.fetch_single_airport(icao)
+    else:
+        airport_data = {icao: current_data.get(icao)}
     
     if airport_data:
         # Store in current_data so it persists
-        current_data.update(airport_data)
+        if cluster.is_leader:
+            _publish_boards(airport_data)
         
         # Re-fetch airport_info to get the updated has_stands flag
         final_airport_info = flight_fetcher.get_airport_info(icao)
@@ -1056,46 +1343,61 @@ def get_events():
 def handle_join(data):
     """Client wants to view a specific airport"""
     airport = data.get('airport', 'LSZH').upper()
+    encoding = data.get('encoding', 'json')
+    if encoding not in ENCODINGS:
+        encoding = 'json'
     previous = client_airports.get(request.sid)
-    if previous and previous != airport:
-        leave_room(previous)
-        _decrement_airport(previous)
-
-    join_room(airport)
-    client_airports[request.sid] = airport
-    _increment_airport(airport)
+    already_joined = previous == airport and client_encodings.get(request.sid) == encoding
+    if previous and not already_joined:
+        _leave_airport_room(previous)
+    if not already_joined:
+        _join_airport_room(airport, encoding)
     if not _is_tracking_excluded_ip() and data.get('explicit', True):
         _record_airport_join(airport)
     print(f"Client {request.sid} joined {airport}")
     
-    # If it's a dynamic airport not in current_data, fetch it
-    if airport not in current_data and airport not in flight_fetcher.configured_airports:
-        print(f"Fetching dynamic airport on join: {airport}")
+    # Dynamic airports and idle ones whose board is behind the latest
+    # snapshot are built on demand from it; followers take the leader's latest
+    if not cluster.is_leader:
+        _follow_leader()
+    elif not _board_is_current(airport):
+        print(f"Building board on join: {airport}")
         airport_data = flight_fetcher.fetch_single_airport(airport)
         if airport_data:
-            current_data.update(airport_data)
-            emit('flight_update', airport_data[airport])
-            return
-    
-    # Send immediate update for that airport if we have data
-    if airport in current_data:
-        emit('flight_update', current_data[airport])
+            # The joiner is already in the room but gets the full board below
+            _publish_boards(airport_data, skip_sid=request.sid)
+
+    # Send the full board; later updates arrive as flight_delta
+    _emit_snapshot(airport, encoding)
+
+@socketio.on('resync_airport')
+def handle_resync(data):
+    """Client missed a delta (sequence gap) and needs the full board again"""
+    airport = (data.get('airport') or '').upper()
+    if airport and client_airports.get(request.sid) == airport:
+        if not cluster.is_leader:
+            _follow_leader()
+        _emit_snapshot(airport, client_encodings.get(request.sid, 'json'))
+
+def _emit_snapshot(airport, encoding):
+    data = _snapshot_bytes(airport, encoding)
+    if data is not None:
+        emit('flight_update', data)
 
 @socketio.on('leave_airport')
 def handle_leave(data):
     airport = data.get('airport')
     if airport:
         airport = airport.upper()
-        leave_room(airport)
         if client_airports.get(request.sid) == airport:
             client_airports.pop(request.sid, None)
-        _decrement_airport(airport)
+            _leave_airport_room(airport)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     airport = client_airports.pop(request.sid, None)
     if airport:
-        _decrement_airport(airport)
+        _leave_airport_room(airport)
 
 if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,103 @@
+"""
+Delta encoding for flight_update broadcasts
+Keeps the last board sent to each airport room with a sequence number and
+turns the next board into added/changed/removed rows keyed by callsign, so
+rooms only receive what moved between updates
+"""
+
+import threading
+
+ROW_LISTS = ('departures', 'arrivals')
+
+
+def _rows_by_callsign(rows):
+    """Returns: dict of {callsign: row}, or None if callsigns are missing or repeated"""
+    keyed = {}
+    for row in rows:
+        callsign = row.get('callsign')
+        if callsign is None or callsign in keyed:
+            return None
+        keyed[callsign] = row
+    return keyed
+
+
+def _diff_rows(old_rows, new_rows):
+    """Returns: the list delta between two board lists, None if unchanged, or False if it can't be keyed"""
+    old = _rows_by_callsign(old_rows)
+    new = _rows_by_callsign(new_rows)
+    if old is None or new is None:
+        return False
+
+    added, changed = [], []
+    for callsign, row in new.items():
+        previous = old.get(callsign)
+        if previous is None:
+            added.append(row)
+        elif previous != row:
+            changed.append(row)
+    removed = [callsign for callsign in old if callsign not in new]
+    order = list(new)
+    if not added and not changed and not removed and order == list(old):
+        return None
+
+    delta = {'added': added, 'changed': changed, 'removed': removed}
+    if order != list(old):
+        delta['order'] = order  # Omitted when rows only changed in place
+    return delta
+
+
+class BoardDeltas:
+    def __init__(self):
+        self.boards = {}    # icao -> last board published to its room
+        self.seq = {}       # icao -> sequence number of that board
+        self._lock = threading.Lock()
+
+    def update(self, code, board):
+        """
+        Record board as the latest for code.
+        Returns: (event, payload) to emit to the room, or None if nothing changed.
+        The event is 'flight_delta', or 'flight_update' with a full snapshot for
+        a new airport or when a list can't be keyed by callsign.
+        """
+        with self._lock:
+            previous = self.boards.get(code)
+            delta = {}
+            if previous is not None:
+                for key in ROW_LISTS:
+                    rows = _diff_rows(previous.get(key, []), board.get(key, []))
+                    if rows is False:
+                        previous = None
+                        break
+                    if rows is not None:
+                        delta[key] = rows
+            if previous is not None:
+                meta = {key: value for key, value in board.items()
+                        if key not in ROW_LISTS and previous.get(key) != value}
+                if meta:
+                    delta['meta'] = meta
+                if not delta:
+                    return None
+
+            self.boards[code] = board
+            self.seq[code] = self.seq.get(code, 0) + 1
+            if previous is None:
+                return 'flight_update', self._snapshot(code)
+            delta['airport'] = code
+            delta['seq'] = self.seq[code]
+            return 'flight_delta', delta
+
+    def load(self, boards, seq):
+        """Adopt boards and sequence numbers published by another process"""
+        with self._lock:
+            self.boards = dict(boards)
+            self.seq = dict(seq)
+
+    def _snapshot(self, code):
+        return {**self.boards[code], 'airport': code, 'seq': self.seq[code]}
+
+    def snapshot(self, code):
+        """Returns: the full flight_update payload for code, or None if it has no board yet"""
+        with self._lock:
+            if code not in self.boards:
+                return None
+            return self._snapshot(code)
@@ -0,0 +1,24 @@
+"""
+Board clock
+Single source of "now" for flight timing logic, so snapshot replays can
+freeze it at the time a recorded feed was captured
+"""
+
+from datetime import datetime
+
+_frozen_at = None
+
+
+def utcnow():
+    """Current UTC time as a naive datetime, or the frozen time if set."""
+    return _frozen_at if _frozen_at is not None else datetime.utcnow()
+
+
+def freeze(moment):
+    global _frozen_at
+    _frozen_at = moment
+
+
+def unfreeze():
+    global _frozen_at
+    _frozen_at = None
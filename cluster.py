@@ -0,0 +1,299 @@
+"""
+Multi-process coordination
+With a Socket.IO message queue configured, several web workers can run side
+by side: one holds the leader lock and runs the fetch/update cycle,
+publishing its boards to a shared store, while the others serve sockets and
+REST from that store and report their room counts and stand edits back to
+the leader.
+Redis is used for the lock and store when the queue is Redis; otherwise a
+file lock and a shared directory cover workers on one host
+"""
+
+import os
+import socket
+import time
+from payload_cache import encode_json, decode_json
+
+# Redis client for leader lock and shared state across hosts
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# File lock for workers on a single host
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+class LocalCluster:
+    """Single process: always the leader and nothing is shared."""
+    shared = False
+    is_leader = True
+
+    def elect(self):
+        return True
+
+    def publish(self, state):
+        pass
+
+    def load(self):
+        return None
+
+    def report_counts(self, counts, rooms):
+        pass
+
+    def viewer_counts(self, counts):
+        return counts
+
+    def room_counts(self, rooms):
+        return rooms
+
+    def send_stands(self, update):
+        pass
+
+    def take_stand_updates(self):
+        return []
+
+
+class _SharedCluster:
+    shared = True
+
+    def __init__(self, counts_ttl):
+        self.worker_id = WORKER_ID
+        self.is_leader = False
+        self.counts_ttl = counts_ttl    # seconds a worker's room counts stay valid
+        self.loaded_version = None      # version of the shared state last returned by load()
+
+    def _total(self, local, field):
+        total = dict(local)
+        now = time.time()
+        for worker, report in self._read_counts().items():
+            if worker == self.worker_id or now - report['at'] > self.counts_ttl:
+                continue
+            for key, count in report.get(field, {}).items():
+                total[key] = total.get(key, 0) + count
+        return total
+
+    def viewer_counts(self, counts):
+        """Returns: viewers per airport on this worker (counts) plus every other live worker"""
+        return self._total(counts, 'counts')
+
+    def room_counts(self, rooms):
+        """Returns: clients per Socket.IO room on this worker (rooms) plus every other live worker"""
+        return self._total(rooms, 'rooms')
+
+
+class FileCluster(_SharedCluster):
+    def __init__(self, directory, counts_ttl=30):
+        super().__init__(counts_ttl)
+        self.directory = directory
+        self.counts_dir = os.path.join(directory, 'counts')
+        self.updates_dir = os.path.join(directory, 'stand_updates')
+        self.state_path = os.path.join(directory, 'state.json')
+        self._lock_file = None
+        os.makedirs(self.counts_dir, exist_ok=True)
+        os.makedirs(self.updates_dir, exist_ok=True)
+
+    def elect(self):
+        """Take the leader lock if it is free. The lock is held until this process exits."""
+        if self._lock_file is None:
+            lock_file = open(os.path.join(self.directory, 'leader.lock'), 'a+')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+            else:
+                self._lock_file = lock_file
+                print(f"Cluster: {self.worker_id} is now the leader")
+        self.is_leader = self._lock_file is not None
+        return self.is_leader
+
+    def _write(self, path, data):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def publish(self, state):
+        self._write(self.state_path, encode_json(state))
+
+    def load(self):
+        """Returns: the shared state if it changed since the last load(), else None"""
+        try:
+            version = os.stat(self.state_path).st_mtime_ns
+            if version == self.loaded_version:
+                return None
+            with open(self.state_path, 'rb') as f:
+                state = decode_json(f.read())
+        except (OSError, ValueError):
+            return None
+        self.loaded_version = version
+        return state
+
+    def _counts_path(self, worker):
+        return os.path.join(self.counts_dir, worker.replace(':', '-').replace(os.sep, '_') + '.json')
+
+    def report_counts(self, counts, rooms):
+        self._write(self._counts_path(self.worker_id),
+                    encode_json({'worker': self.worker_id, 'at': time.time(), 'counts': counts, 'rooms': rooms}))
+
+    def _read_counts(self):
+        reports = {}
+        for filename in os.listdir(self.counts_dir):
+            path = os.path.join(self.counts_dir, filename)
+            try:
+                with open(path, 'rb') as f:
+                    report = decode_json(f.read())
+            except (OSError, ValueError):
+                continue
+            if time.time() - report['at'] > self.counts_ttl * 10:
+                try:
+                    os.remove(path)  # Worker is long gone
+                except OSError:
+                    pass
+                continue
+            reports[report['worker']] = report
+        return reports
+
+    def send_stands(self, update):
+        """Queue a stand change made on this worker for the leader to apply"""
+        filename = f"{time.time_ns()}-{self.worker_id.replace(':', '-').replace(os.sep, '_')}.json"
+        self._write(os.path.join(self.updates_dir, filename), encode_json(update))
+
+    def take_stand_updates(self):
+        """Returns: queued stand changes, oldest first, removing them from the queue"""
+        updates = []
+        for filename in sorted(os.listdir(self.updates_dir)):
+            if not filename.endswith('.json'):
+                continue  # Still being written
+            path = os.path.join(self.updates_dir, filename)
+            try:
+                with open(path, 'rb') as f:
+                    update = decode_json(f.read())
+                os.remove(path)
+            except (OSError, ValueError):
+                continue
+            updates.append(update)
+        return updates
+
+
+class RedisCluster(_SharedCluster):
+    # Extend the lock only while we still own it
+    RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(self, url, prefix='flightboard', leader_ttl=30, counts_ttl=30):
+        super().__init__(counts_ttl)
+        self.redis = redis.Redis.from_url(url)
+        self.leader_key = f'{prefix}:leader'
+        self.state_key = f'{prefix}:state'
+        self.version_key = f'{prefix}:state_version'
+        self.counts_key = f'{prefix}:counts'
+        self.updates_key = f'{prefix}:stand_updates'
+        self.leader_ttl_ms = int(leader_ttl * 1000)
+        self._renew = self.redis.register_script(self.RENEW_SCRIPT)
+
+    def elect(self):
+        """Renew the leader lock, or take it if it has expired."""
+        was_leader = self.is_leader
+        try:
+            if self.is_leader:
+                self.is_leader = bool(self._renew(keys=[self.leader_key], args=[self.worker_id, self.leader_ttl_ms]))
+            if not self.is_leader:
+                self.is_leader = bool(self.redis.set(self.leader_key, self.worker_id, nx=True, px=self.leader_ttl_ms))
+        except redis.RedisError as e:
+            # Without Redis another worker may take over once the lock expires
+            print(f"Cluster: leader election failed: {e}")
+            self.is_leader = False
+        if self.is_leader != was_leader:
+            print(f"Cluster: {self.worker_id} is {'now' if self.is_leader else 'no longer'} the leader")
+        return self.is_leader
+
+    def publish(self, state):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self.state_key, encode_json(state))
+        pipe.incr(self.version_key)
+        pipe.execute()
+
+    def load(self):
+        """Returns: the shared state if it changed since the last load(), else None"""
+        try:
+            version = self.redis.get(self.version_key)
+            if version is None or version == self.loaded_version:
+                return None
+            data = self.redis.get(self.state_key)
+        except redis.RedisError as e:
+            print(f"Cluster: could not load shared state: {e}")
+            return None
+        if data is None:
+            return None
+        self.loaded_version = version
+        return decode_json(data)
+
+    def report_counts(self, counts, rooms):
+        try:
+            self.redis.hset(self.counts_key, self.worker_id,
+                            encode_json({'worker': self.worker_id, 'at': time.time(), 'counts': counts, 'rooms': rooms}))
+        except redis.RedisError as e:
+            print(f"Cluster: could not report room counts: {e}")
+
+    def _read_counts(self):
+        try:
+            raw = self.redis.hgetall(self.counts_key)
+        except redis.RedisError:
+            return {}
+        reports = {}
+        for worker, data in raw.items():
+            report = decode_json(data)
+            if time.time() - report['at'] > self.counts_ttl * 10:
+                self.redis.hdel(self.counts_key, worker)  # Worker is long gone
+                continue
+            reports[report['worker']] = report
+        return reports
+
+    def send_stands(self, update):
+        """Queue a stand change made on this worker for the leader to apply"""
+        try:
+            self.redis.rpush(self.updates_key, encode_json(update))
+        except redis.RedisError as e:
+            print(f"Cluster: could not send stand update: {e}")
+
+    def take_stand_updates(self):
+        """Returns: queued stand changes, oldest first, removing them from the queue"""
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.lrange(self.updates_key, 0, -1)
+            pipe.delete(self.updates_key)
+            raw, _ = pipe.execute()
+        except redis.RedisError as e:
+            print(f"Cluster: could not read stand updates: {e}")
+            return []
+        return [decode_json(data) for data in raw]
+
+
+def make_cluster(message_queue_url, state_dir, leader_ttl=30):
+    """
+    Returns: the coordinator for this worker. LocalCluster without a
+    message queue; otherwise RedisCluster for a Redis queue, or FileCluster
+    (workers on one host) for other queues.
+    """
+    if not message_queue_url:
+        return LocalCluster()
+    if message_queue_url.startswith(('redis://', 'rediss://', 'unix://')) and REDIS_AVAILABLE:
+        print(f"Cluster: worker {WORKER_ID} coordinating through Redis")
+        return RedisCluster(message_queue_url, leader_ttl=leader_ttl, counts_ttl=leader_ttl)
+    if FCNTL_AVAILABLE:
+        print(f"Cluster: worker {WORKER_ID} coordinating through {state_dir}/")
+        return FileCluster(state_dir, counts_ttl=leader_ttl)
+    print("Cluster: no Redis client or file locking available, running as a single process")
+    return LocalCluster()
@@ -0,0 +1,42 @@
+"""
+Columnar board encoding
+Opt-in wire format for clients that join with encoding='columnar': each
+flight list is sent as one key list plus an array of values per row, so
+key names aren't repeated for every flight, and fields the boards don't
+display are left out
+"""
+
+ENCODING = 'columnar'
+ROW_LISTS = ('departures', 'arrivals')
+DROPPED_FIELDS = frozenset({'route'})  # Fetched on demand from /api/flight/<callsign>
+
+
+def compact_rows(rows):
+    """Returns: {'k': [keys], 'r': [[values], ...]} for a list of flight dicts"""
+    keys = {}
+    for row in rows:
+        for key in row:
+            if key not in DROPPED_FIELDS:
+                keys[key] = None
+    keys = list(keys)
+    return {'k': keys, 'r': [[row.get(key) for key in keys] for row in rows]}
+
+
+def compact_snapshot(payload):
+    """Returns: a full flight_update payload with its lists in columnar form"""
+    compact = {key: value for key, value in payload.items() if key not in ROW_LISTS}
+    for key in ROW_LISTS:
+        compact[key] = compact_rows(payload.get(key, []))
+    compact['encoding'] = ENCODING
+    return compact
+
+
+def compact_delta(delta):
+    """Returns: a flight_delta payload with its added and changed rows in columnar form"""
+    compact = dict(delta)
+    for key in ROW_LISTS:
+        rows = delta.get(key)
+        if rows is not None:
+            compact[key] = {**rows, 'added': compact_rows(rows['added']), 'changed': compact_rows(rows['changed'])}
+    compact['encoding'] = ENCODING
+    return compact
@@ -6,6 +6,29 @@ load_dotenv()
 class Config:
     AIRPORT_CODE = os.getenv('AIRPORT_CODE', 'LSZH')
     UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', 20))
+    FETCH_DEADLINE = float(os.getenv('FETCH_DEADLINE', 8))
+    # Boards (and METARs) for airports nobody is viewing are rebuilt at most this often
+    IDLE_BOARD_INTERVAL = int(os.getenv('IDLE_BOARD_INTERVAL', 300))
+    # Socket.IO message queue (e.g. redis://localhost:6379/0) for running several
+    # workers with one elected fetcher; '' runs a single process
+    MESSAGE_QUEUE_URL = os.getenv('MESSAGE_QUEUE_URL', '').strip()
+    # Leader lock and shared boards when the queue isn't Redis (workers on one host)
+    CLUSTER_STATE_DIR = os.getenv('CLUSTER_STATE_DIR', os.path.join('data', 'cluster'))
+    CLUSTER_SYNC_INTERVAL = int(os.getenv('CLUSTER_SYNC_INTERVAL', 3))
+    LEADER_TTL = int(os.getenv('LEADER_TTL', 30))
+    UKCP_REFRESH_INTERVAL = int(os.getenv('UKCP_REFRESH_INTERVAL', 60))
+    # UKCP stand list, cached in data/ukcp_stands.json over the bundled static/ukcp_stands.json ('' disables)
+    UKCP_STANDS_URL = os.getenv('UKCP_STANDS_URL', 'https://ukcp.vatsim.uk/api/stand/dependency').strip()
+    UKCP_STANDS_REFRESH_HOURS = float(os.getenv('UKCP_STANDS_REFRESH_HOURS', 24))
+    # Record raw VATSIM snapshots to this directory, or replay them from one
+    VATSIM_RECORD_DIR = os.getenv('VATSIM_RECORD_DIR', '').strip()
+    VATSIM_REPLAY_DIR = os.getenv('VATSIM_REPLAY_DIR', '').strip()
+    VATSIM_REPLAY_SPEED = float(os.getenv('VATSIM_REPLAY_SPEED', 1))
+    # Stream-parse the VATSIM feed with ijson (less memory, slower parse)
+    VATSIM_STREAM_FEED = os.getenv('VATSIM_STREAM_FEED', '').lower() in ('1', 'true', 'yes')
+    # How long OSM stand results (and "no stands" results) are cached on disk
+    OSM_STANDS_TTL_HOURS = float(os.getenv('OSM_STANDS_TTL_HOURS', 168))
+    OSM_STANDS_NEGATIVE_TTL_HOURS = float(os.getenv('OSM_STANDS_NEGATIVE_TTL_HOURS', 24))
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'change-me')
@@ -0,0 +1,176 @@
+"""
+Update cycle instrumentation
+Times each stage of update_flights and keeps rolling history for the admin
+metrics endpoint. Only the cycle's own thread (and worker threads it hands
+the cycle to) record stages, so boards built for a join or search don't skew
+the breakdown. Scheduler jobs outside the cycle are timed as jobs.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def _percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(q):
+        return round(ordered[min(last, int(round(q * last)))], 2)
+
+    return {
+        'count': len(ordered),
+        'avg': round(sum(ordered) / len(ordered), 2),
+        'p50': pick(0.50),
+        'p90': pick(0.90),
+        'p99': pick(0.99),
+        'max': round(ordered[-1], 2),
+    }
+
+
+class CycleMetrics:
+    def __init__(self, history=60):
+        self.history = history
+        self.cycles = deque(maxlen=history)     # finished cycle breakdowns, oldest first
+        self.airport_samples = {}               # icao -> deque of processing ms
+        self.job_samples = {}                   # job name -> deque of run ms
+        self._current = None
+        self._local = threading.local()         # .cycle: the cycle this thread records into
+        self._lock = threading.Lock()
+
+    def start_cycle(self):
+        with self._lock:
+            self._current = {
+                'started_at': time.time(),
+                '_start': time.perf_counter(),
+                'stages': {},
+                'airports': {},
+                'status': None,
+            }
+            self._local.cycle = self._current
+
+    def current(self):
+        """Returns: the cycle this thread records into, for handing to worker threads with joined()"""
+        return getattr(self._local, 'cycle', None)
+
+    @contextmanager
+    def joined(self, cycle):
+        """Record into cycle from this thread (e.g. a fetch worker) inside the block"""
+        previous = self.current()
+        self._local.cycle = cycle
+        try:
+            yield
+        finally:
+            self._local.cycle = previous
+
+    def _recording(self):
+        """Returns: the running cycle if this thread belongs to it, else None"""
+        cycle = self.current()
+        return cycle if cycle is not None and cycle is self._current else None
+
+    def end_cycle(self, status='ok'):
+        """Close the current cycle and add it to the rolling history. Returns: the cycle breakdown"""
+        with self._lock:
+            cycle = self._current
+            self._current = None
+            self._local.cycle = None
+            if cycle is None:
+                return None
+            cycle['status'] = status
+            cycle['total_ms'] = round((time.perf_counter() - cycle.pop('_start')) * 1000.0, 2)
+            cycle['stages'] = {k: round(v, 2) for k, v in cycle['stages'].items()}
+            for icao, ms in cycle['airports'].items():
+                self.airport_samples.setdefault(icao, deque(maxlen=self.history)).append(ms)
+            cycle['airports'] = {k: round(v, 2) for k, v in cycle['airports'].items()}
+            self.cycles.append(cycle)
+        return cycle
+
+    def record(self, stage, ms):
+        """Add ms to a stage of the running cycle (stages may be recorded more than once)."""
+        with self._lock:
+            cycle = self._recording()
+            if cycle is not None:
+                stages = cycle['stages']
+                stages[stage] = stages.get(stage, 0.0) + ms
+
+    def record_airport(self, icao, ms):
+        with self._lock:
+            cycle = self._recording()
+            if cycle is not None:
+                airports = cycle['airports']
+                airports[icao] = airports.get(icao, 0.0) + ms
+
+    @contextmanager
+    def job(self, name):
+        """Time a scheduler job that runs outside the update cycle (e.g. the UKCP refresh)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self.job_samples.setdefault(name, deque(maxlen=self.history)).append(ms)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000.0)
+
+    def summary(self, last=10):
+        """
+        Returns: rolling percentiles per stage, per airport and per job, the
+        cycle total and skip counts, plus the most recent `last` cycle breakdowns.
+        """
+        with self._lock:
+            cycles = list(self.cycles)
+            airport_samples = {k: list(v) for k, v in self.airport_samples.items()}
+            job_samples = {k: list(v) for k, v in self.job_samples.items()}
+
+        stage_samples = {}
+        for cycle in cycles:
+            for stage, ms in cycle['stages'].items():
+                stage_samples.setdefault(stage, []).append(ms)
+        processed = [c for c in cycles if c['status'] == 'ok']
+
+        airports = {}
+        for icao, samples in airport_samples.items():
+            airports[icao] = {'last_ms': round(samples[-1], 2), **_percentiles(samples)}
+
+        return {
+            'cycles_recorded': len(cycles),
+            'cycles_skipped': sum(1 for c in cycles if c['status'] == 'skipped'),
+            'total_ms': _percentiles([c['total_ms'] for c in processed]),
+            'stages': {stage: _percentiles(samples) for stage, samples in stage_samples.items()},
+            'airports': dict(sorted(airports.items(), key=lambda kv: -kv[1]['avg'])),
+            'jobs': {name: {'last_ms': round(samples[-1], 2), **_percentiles(samples)}
+                     for name, samples in job_samples.items()},
+            'last_cycles': cycles[-last:][::-1],
+        }
+
+
+class TimedJson:
+    """
+    json-compatible module for Flask-SocketIO that records how long packet
+    encoding takes as the 'serialization' stage of the running cycle (emits
+    from other threads aren't counted).
+    """
+
+    def __init__(self, metrics, json_module):
+        self.metrics = metrics
+        self.json = json_module
+
+    def dumps(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.json.dumps(*args, **kwargs)
+        finally:
+            self.metrics.record('serialization', (time.perf_counter() - start) * 1000.0)
+
+    def loads(self, *args, **kwargs):
+        return self.json.loads(*args, **kwargs)
@@ -0,0 +1,114 @@
+"""
+VATSIM feed record/replay
+Records each raw vatsim-data.json snapshot to disk (gzip, timestamped) and
+replays a recorded sequence at real or accelerated speed for offline
+benchmarking and regression testing
+"""
+
+import glob
+import gzip
+import os
+import time
+from datetime import datetime
+
+import clock
+
+FILENAME_FORMAT = 'vatsim-%Y%m%dT%H%M%SZ.json.gz'
+FILENAME_GLOB = 'vatsim-*.json.gz'
+
+
+class _TeeReader:
+    """File-like wrapper that copies everything read into a gzip file."""
+
+    def __init__(self, source, path):
+        self._source = source
+        self._path = path
+        self._partial = path + '.part'
+        self._out = gzip.open(self._partial, 'wb')
+
+    def read(self, size=-1):
+        chunk = self._source.read(size)
+        self._out.write(chunk)
+        return chunk
+
+    def finish(self, keep):
+        """Close the copy and keep it only if the whole body was read."""
+        if keep:
+            # Drain whatever the parser left unread so the recording is complete
+            while True:
+                chunk = self._source.read(65536)
+                if not chunk:
+                    break
+                self._out.write(chunk)
+        self._out.close()
+        if keep:
+            os.replace(self._partial, self._path)
+        else:
+            os.remove(self._partial)
+
+
+class FeedRecorder:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.recorded = 0
+
+    def tee(self, source):
+        """Wrap a raw response body so it is recorded while being parsed."""
+        path = os.path.join(self.directory, datetime.utcnow().strftime(FILENAME_FORMAT))
+        return _TeeReader(source, path)
+
+    def finish(self, reader, keep):
+        reader.finish(keep)
+        if keep:
+            self.recorded += 1
+
+
+class FeedReplayer:
+    """
+    Serves recorded snapshots in capture order. With speed > 0 the snapshot
+    shown is the latest one whose capture offset fits into the elapsed wall
+    time multiplied by speed; with speed == 0 every call advances by one
+    snapshot (as fast as the caller can consume them).
+
+    While replaying, clock.utcnow() is frozen at the capture time of the
+    snapshot being served, so delay and timing logic sees the original time.
+    """
+
+    def __init__(self, directory, speed=1.0, loop=False):
+        self.directory = directory
+        self.speed = speed
+        self.loop = loop
+        self.files = sorted(glob.glob(os.path.join(directory, FILENAME_GLOB)))
+        if not self.files:
+            raise ValueError(f'No recorded snapshots found in {directory}')
+        self.captured_at = [
+            datetime.strptime(os.path.basename(p), FILENAME_FORMAT) for p in self.files
+        ]
+        self.offsets = [(t - self.captured_at[0]).total_seconds() for t in self.captured_at]
+        self.url = f'replay://{os.path.abspath(directory)}'
+        self._started = None
+        self._step = -1
+
+    def _current_position(self):
+        if self.speed <= 0:
+            self._step += 1
+            position = self._step
+        else:
+            if self._started is None:
+                self._started = time.monotonic()
+            elapsed = (time.monotonic() - self._started) * self.speed
+            if self.loop and self.offsets[-1] > 0:
+                elapsed %= self.offsets[-1] + 1
+            position = 0
+            while position + 1 < len(self.offsets) and self.offsets[position + 1] <= elapsed:
+                position += 1
+        if self.loop:
+            return position % len(self.files)
+        return min(position, len(self.files) - 1)
+
+    def open_current(self):
+        """Open the snapshot due now (binary, decompressed) and freeze the clock at its capture time."""
+        position = self._current_position()
+        clock.freeze(self.captured_at[position])
+        return gzip.open(self.files[position], 'rb')
@@ -0,0 +1,85 @@
+"""
+Concurrent upstream fetch stage for the update cycle
+Runs the cycle's network fetches side by side under one deadline so a slow
+upstream can't hold back the board broadcast
+"""
+
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+
+class FetchPipeline:
+    def __init__(self, deadline, max_workers=6, metrics=None):
+        self.deadline = deadline  # seconds allowed for the whole fetch stage
+        self.metrics = metrics    # Optional CycleMetrics; each task is recorded as a stage
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+
+        # name -> Future still running after an earlier cycle's deadline
+        self._inflight = {}
+
+        # name -> {'ok': int, 'errors': int, 'late': int, 'last_ms': float}
+        self.stats = {}
+
+    def _run_task(self, name, func, cycle):
+        start = time.perf_counter()
+        # Stages go to the cycle that started the task, even if it finishes late
+        with self.metrics.joined(cycle) if self.metrics else nullcontext():
+            try:
+                return func()
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000.0
+                self.stats[name]['last_ms'] = round(elapsed, 1)
+                if self.metrics:
+                    self.metrics.record(name, elapsed)
+
+    def run(self, tasks):
+        """
+        Run every task in tasks ({name: callable}) concurrently and wait at
+        most `deadline` seconds for them.
+
+        Tasks are expected to refresh their own caches (feed snapshot, METAR,
+        UKCP, events), so anything that misses the deadline simply leaves the
+        last cached value in place. A task still running from an earlier cycle
+        is not started again; its result lands whenever it finishes.
+
+        Returns: dict of {name: 'ok' | 'error' | 'late'}
+        """
+        cycle = self.metrics.current() if self.metrics else None
+        futures = {}
+        for name, func in tasks.items():
+            self.stats.setdefault(name, {'ok': 0, 'errors': 0, 'late': 0, 'last_ms': None})
+            previous = self._inflight.get(name)
+            if previous is not None and not previous.done():
+                futures[name] = previous
+            else:
+                futures[name] = self.executor.submit(self._run_task, name, func, cycle)
+
+        wait(futures.values(), timeout=self.deadline)
+
+        report = {}
+        for name, future in futures.items():
+            if not future.done():
+                self._inflight[name] = future
+                self.stats[name]['late'] += 1
+                report[name] = 'late'
+                continue
+            self._inflight.pop(name, None)
+            try:
+                future.result()
+                self.stats[name]['ok'] += 1
+                report[name] = 'ok'
+            except Exception as e:
+                self.stats[name]['errors'] += 1
+                report[name] = 'error'
+                print(f"Fetch task {name} failed: {e}")
+                traceback.print_exc()
+
+        late = [name for name, status in report.items() if status == 'late']
+        if late:
+            print(f"Fetch deadline ({self.deadline}s) missed by: {', '.join(late)}; using cached data")
+        return report
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
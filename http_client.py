@@ -0,0 +1,133 @@
+"""
+Shared HTTP client for all outbound integrations
+Keeps one keep-alive connection pool per upstream host, with per-host
+timeouts, retry/backoff policy and latency stats
+"""
+
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'VATSIM-FlightBoard/1.0'
+
+DEFAULT_POLICY = {
+    'timeout': 10,      # seconds (connect + read)
+    'retries': 1,       # retries on connection errors and 429/5xx
+    'backoff': 0.5,     # urllib3 backoff factor between retries
+    'pool_size': 4,     # max keep-alive connections kept for the host
+}
+
+# Per-host overrides of DEFAULT_POLICY
+HOST_POLICIES = {
+    'data.vatsim.net':           {'timeout': 10, 'retries': 2},
+    'metar.vatsim.net':          {'timeout': 2, 'retries': 0, 'pool_size': 8},
+    'ukcp.vatsim.uk':            {'timeout': 5, 'retries': 1},
+    'vatsim.net':                {'timeout': 8, 'retries': 1},
+    'overpass-api.de':           {'timeout': 15, 'retries': 0},
+    'raw.githubusercontent.com': {'timeout': 10, 'retries': 2},
+    'images.kiwi.com':           {'timeout': 5, 'retries': 1, 'pool_size': 8},
+}
+
+LATENCY_SAMPLES = 200  # Per-host samples kept for percentiles
+
+
+class HttpClient:
+    def __init__(self, policies=None):
+        self.policies = dict(HOST_POLICIES if policies is None else policies)
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def policy(self, host):
+        return {**DEFAULT_POLICY, **self.policies.get(host, {})}
+
+    def _session(self, host):
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                policy = self.policy(host)
+                retry = Retry(
+                    total=policy['retries'],
+                    backoff_factor=policy['backoff'],
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=None,  # Overpass queries are POSTs but idempotent
+                    raise_on_status=False,
+                    respect_retry_after_header=True,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=policy['pool_size'], max_retries=retry)
+                session = requests.Session()
+                session.headers['User-Agent'] = USER_AGENT
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._stats[host] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'samples': deque(maxlen=LATENCY_SAMPLES),
+                }
+        return session
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session for the URL's host.
+        Uses the host's policy timeout unless one is passed explicitly.
+        """
+        host = urlsplit(url).hostname or ''
+        session = self._session(host)
+        kwargs.setdefault('timeout', self.policy(host)['timeout'])
+
+        stats = self._stats[host]
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            stats['errors'] += 1
+            raise
+        finally:
+            stats['requests'] += 1
+            stats['samples'].append((time.perf_counter() - start) * 1000.0)
+        if response.status_code >= 500:
+            stats['errors'] += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def host_stats(self):
+        """
+        Returns: dict of {host: {requests, errors, latency_ms: {avg, p50, p95, max}}}
+        computed over the most recent LATENCY_SAMPLES requests per host.
+        """
+        result = {}
+        for host, stats in list(self._stats.items()):
+            samples = sorted(stats['samples'])
+            latency = {}
+            if samples:
+                latency = {
+                    'avg': round(sum(samples) / len(samples), 1),
+                    'p50': round(samples[len(samples) // 2], 1),
+                    'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+                    'max': round(samples[-1], 1),
+                }
+            result[host] = {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'latency_ms': latency,
+                'policy': self.policy(host),
+            }
+        return result
+
+
+# Process-wide client shared by every integration
+client = HttpClient()
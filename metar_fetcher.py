@@ -0,0 +1,74 @@
+"""
+METAR retrieval for the flight boards
+Fetches METARs from metar.vatsim.net concurrently and caches them per station
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http_client import client as http
+
+
+class MetarFetcher:
+    def __init__(self, max_workers=8):
+        self.api_url = 'https://metar.vatsim.net/{}'
+        self.max_workers = max_workers
+        self.cache_duration = timedelta(minutes=10)  # METARs are issued every 30-60 min
+        self.retry_after = timedelta(minutes=1)      # Back-off before retrying a failed station
+
+        # station -> {'metar': str or None, 'fetched_at': datetime, 'ok': bool}
+        self.cache = {}
+
+    def _is_fresh(self, entry, now):
+        if entry is None:
+            return False
+        ttl = self.cache_duration if entry['ok'] else self.retry_after
+        return now - entry['fetched_at'] < ttl
+
+    def _fetch_one(self, code):
+        """Fetch a single METAR. Returns the raw string, or None on failure."""
+        try:
+            response = http.get(self.api_url.format(code))
+            if response.status_code != 200:
+                return None
+            metar = response.text.strip()
+            return metar or None
+        except Exception:
+            return None
+
+    def refresh(self, codes):
+        """
+        Fetch every station in codes whose cached METAR is missing or stale,
+        all at once on a small thread pool.
+        """
+        now = datetime.utcnow()
+        stale = [c for c in dict.fromkeys(codes) if not self._is_fresh(self.cache.get(c), now)]
+        if not stale:
+            return
+
+        workers = min(self.max_workers, len(stale))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self._fetch_one, stale))
+
+        fetched_at = datetime.utcnow()
+        failed = 0
+        for code, metar in zip(stale, results):
+            previous = self.cache.get(code)
+            if metar is not None:
+                self.cache[code] = {'metar': metar, 'fetched_at': fetched_at, 'ok': True}
+            else:
+                failed += 1
+                # Keep serving the last good METAR until the next retry
+                self.cache[code] = {
+                    'metar': previous['metar'] if previous else None,
+                    'fetched_at': fetched_at,
+                    'ok': False,
+                }
+        if failed:
+            print(f"METAR: {failed}/{len(stale)} stations failed to refresh")
+
+    def get_cached(self, code):
+        """Return the last good METAR for a station without any network access."""
+        entry = self.cache.get(code)
+        if entry and entry['metar']:
+            return entry['metar']
+        return 'Unavailable'
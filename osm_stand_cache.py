@@ -0,0 +1,84 @@
+"""
+On-disk cache and background loader for OSM (Overpass) stand data
+Airports without manual stand files get their parking positions from OSM;
+results, including "no parking positions", are kept on disk with a TTL and
+refreshed on a background worker so searches never wait on Overpass
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OsmStandCache:
+    def __init__(self, directory, fetch, ttl=7 * 24 * 3600, negative_ttl=24 * 3600):
+        self.directory = directory
+        self.fetch = fetch                  # icao -> list of stands, or None if the fetch failed
+        self.ttl = ttl                      # seconds a non-empty result stays fresh
+        self.negative_ttl = negative_ttl    # seconds an empty result stays fresh
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='osm')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _path(self, icao):
+        return os.path.join(self.directory, f'{icao}.json')
+
+    def lookup(self, icao):
+        """
+        Returns: (stands, fresh). stands is the cached list ([] for an airport
+        OSM has no parking positions for) or None if nothing is cached.
+        """
+        try:
+            with open(self._path(icao), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            stands = entry['stands']
+            age = time.time() - entry['fetched_at']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, False
+        ttl = self.ttl if stands else self.negative_ttl
+        return stands, age < ttl
+
+    def _store(self, icao, stands):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(icao)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'icao': icao, 'fetched_at': time.time(), 'stands': stands}, f)
+        os.replace(tmp_path, path)
+
+    def request(self, icao, on_result):
+        """
+        Fetch icao's stands in the background unless a fetch is already
+        queued. on_result(icao, stands) is called from the worker after a
+        successful fetch; failures are not cached and leave any old entry.
+        Returns: True if a fetch was queued
+        """
+        with self._lock:
+            if icao in self._pending:
+                return False
+            self._pending.add(icao)
+        self.executor.submit(self._run, icao, on_result)
+        return True
+
+    def _run(self, icao, on_result):
+        try:
+            stands = self.fetch(icao)
+            if stands is None:
+                return
+            try:
+                self._store(icao, stands)
+            except OSError as e:
+                print(f"[OSM] Could not cache stands for {icao}: {e}")
+            on_result(icao, stands)
+        except Exception as e:
+            print(f"[OSM] Background stand fetch for {icao} failed: {e}")
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._pending.discard(icao)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,94 @@
+"""
+Pre-encoded JSON payloads
+Boards are encoded once per version with a fast JSON encoder and the bytes
+are reused for room broadcasts, late joiners and the REST endpoints, along
+with a gzip variant for HTTP clients that accept it
+"""
+
+import gzip
+import json
+import threading
+import time
+
+# Fast JSON encoder (falls back to the standard library)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+GZIP_LEVEL = 6
+
+
+def encode_json(obj):
+    """Returns: obj as compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def decode_json(data):
+    """Returns: the object encoded in JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class PayloadCache:
+    def __init__(self, metrics=None):
+        self.metrics = metrics      # CycleMetrics; encoding is recorded as 'serialization'
+        self.entries = {}           # key -> [version, json bytes, gzip bytes or None]
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def encode(self, obj):
+        """Encode an uncached payload (e.g. a one-off delta). Returns: JSON bytes"""
+        start = time.perf_counter()
+        try:
+            return encode_json(obj)
+        finally:
+            if self.metrics:
+                self.metrics.record('serialization', (time.perf_counter() - start) * 1000.0)
+
+    def _entry(self, key, version, build):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry
+        obj = build()
+        if obj is None:
+            return None
+        entry = [version, self.encode(obj), None]
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = entry  # Only the latest version of each key is kept
+        return entry
+
+    def get(self, key, version, build):
+        """
+        Returns: JSON bytes for key at version, calling build() for the
+        payload object only when that version hasn't been encoded yet.
+        None if build() returns None.
+        """
+        entry = self._entry(key, version, build)
+        return entry[1] if entry else None
+
+    def get_gzip(self, key, version, build):
+        """Returns: the gzip-compressed variant of get(), compressed once per version"""
+        entry = self._entry(key, version, build)
+        if entry is None:
+            return None
+        if entry[2] is None:
+            entry[2] = gzip.compress(entry[1], compresslevel=GZIP_LEVEL)
+        return entry[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'encoder': 'orjson' if ORJSON_AVAILABLE else 'json',
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Benchmark the board-building hot path on synthetic VATSIM feeds.
+
+Generates feeds with a realistic ground/terminal/en-route mix spread across
+the configured airports (2k, 10k and 50k pilots by default), then times each
+stage of the pipeline and tracks peak allocations:
+
+  parse          feed bytes -> trimmed snapshot dict (VatsimFetcher._parse_feed)
+  load_snapshot  airport index + tracking views (VatsimFetcher._load_snapshot)
+  find_stand     geofence lookup for every ground pilot at a board airport
+  match_stands   the same lookups as one batch per airport (VatsimFetcher.match_stands)
+  format_flight  full flight dict for every pilot filed to/from a board airport
+  process_flight format + display filtering for the same pilots
+  sort           departure/arrival ordering of every built board
+  build_boards   the whole in-memory board build (VatsimFetcher.build_boards)
+
+Runs entirely offline: airport coordinates come from the stand centroids in
+static/stands/, METAR and UKCP caches are pre-filled.
+
+Usage:
+    python3 scripts/benchmark_board.py --output bench.json
+    python3 scripts/benchmark_board.py --compare bench.json --threshold 1.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+os.chdir(REPO_ROOT)  # VatsimFetcher loads static/ paths relative to the repo root
+
+import clock  # noqa: E402
+from vatsim_fetcher import VatsimFetcher  # noqa: E402
+
+DEFAULT_SIZES = (2000, 10000, 50000)
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 1
+FROZEN_NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+# Share of pilots per phase; the remainder are en route between arbitrary airports
+PHASE_MIX = (
+    ('at_stand', 0.10),
+    ('pushback', 0.01),
+    ('taxi', 0.04),
+    ('departing', 0.03),
+    ('approaching', 0.05),
+    ('landing', 0.02),
+    ('landed', 0.03),
+)
+OTHER_AIRPORTS = ('LOWW', 'EDDM', 'LEMD', 'LIRF', 'EKCH', 'ESSA', 'KLAX', 'OMDB', 'VHHH', 'YSSY')
+
+
+def airport_coords(stands: Dict[str, List[Dict]]) -> Dict[str, Tuple[float, float]]:
+    coords = {}
+    for icao, items in stands.items():
+        if items:
+            coords[icao] = (
+                sum(s['lat'] for s in items) / len(items),
+                sum(s['lon'] for s in items) / len(items),
+            )
+    return coords
+
+
+def make_fetcher() -> VatsimFetcher:
+    VatsimFetcher.load_airport_database = lambda self: {}
+    fetcher = VatsimFetcher()
+    coords = airport_coords(fetcher.stands)
+    fetcher.airport_db = {
+        icao: {'lat': lat, 'lon': lon, 'name': icao, 'country': ''}
+        for icao, (lat, lon) in coords.items()
+    }
+    for icao in fetcher.configured_airports:
+        fetcher.metar_fetcher.cache[icao] = {
+            'metar': f'{icao} 011200Z 24010KT 9999 FEW030 15/10 Q1015',
+            'fetched_at': datetime.utcnow(),
+            'ok': True,
+        }
+    if fetcher.ukcp_fetcher:
+        fetcher.ukcp_fetcher.cache = {}
+        fetcher.ukcp_fetcher.last_fetch = datetime.utcnow()
+    return fetcher
+
+
+def _offset(rnd: random.Random, lat: float, lon: float, km: float) -> Tuple[float, float]:
+    bearing = rnd.uniform(0, 360)
+    dlat = km / 111.0 * math.cos(math.radians(bearing))
+    dlon = km / 111.0 * math.sin(math.radians(bearing)) / max(math.cos(math.radians(lat)), 0.1)
+    return lat + dlat, lon + dlon
+
+
+def make_pilot(rnd: random.Random, i: int, phase: str, board: str, other: str,
+               coords: Dict[str, Tuple[float, float]], stands: Dict[str, List[Dict]]) -> Dict:
+    outbound = phase in ('at_stand', 'pushback', 'taxi', 'departing') or (phase == 'enroute' and rnd.random() < 0.5)
+    dep, arr = (board, other) if outbound else (other, board)
+    lat, lon = coords.get(board, (0.0, 0.0))
+    gs, alt = 0, 400
+    if phase in ('at_stand', 'pushback', 'landed'):
+        stand = rnd.choice(stands[board]) if stands.get(board) else None
+        if stand and rnd.random() < 0.85:
+            lat, lon = stand['lat'] + rnd.uniform(-5e-5, 5e-5), stand['lon'] + rnd.uniform(-5e-5, 5e-5)
+        else:
+            lat, lon = _offset(rnd, lat, lon, rnd.uniform(0.3, 2.5))
+        gs = {'at_stand': 0, 'pushback': 3, 'landed': rnd.choice((0, 2, 18))}[phase]
+    elif phase == 'taxi':
+        lat, lon = _offset(rnd, lat, lon, rnd.uniform(0.3, 3))
+        gs = rnd.randint(8, 25)
+    elif phase == 'departing':
+        lat, lon = _offset(rnd, lat, lon, rnd.uniform(2, 60))
+        gs, alt = rnd.randint(150, 280), rnd.randint(1000, 5500)
+    elif phase == 'approaching':
+        lat, lon = _offset(rnd, lat, lon, rnd.uniform(25, 240))
+        gs, alt = rnd.randint(180, 300), rnd.randint(4000, 15000)
+    elif phase == 'landing':
+        lat, lon = _offset(rnd, lat, lon, rnd.uniform(2, 24))
+        gs, alt = rnd.randint(130, 170), rnd.randint(500, 3500)
+    else:
+        lat, lon = rnd.uniform(-55, 70), rnd.uniform(-170, 170)
+        gs, alt = rnd.randint(380, 520), rnd.randint(24000, 41000)
+    return {
+        'cid': 1000000 + i,
+        'name': 'Synthetic Pilot',
+        'callsign': f'SYN{i:05d}',
+        'server': 'SYNTH',
+        'pilot_rating': 0,
+        'military_rating': 0,
+        'latitude': lat,
+        'longitude': lon,
+        'altitude': alt,
+        'groundspeed': gs,
+        'transponder': rnd.choice(('2000', '7000', '1000', '4521')),
+        'heading': rnd.randint(0, 359),
+        'qnh_i_hg': 29.92,
+        'qnh_mb': 1013,
+        'flight_plan': {
+            'flight_rules': 'I',
+            'aircraft': 'A20N/M-SDE2E3FGHIJ1RWXY/LB1',
+            'aircraft_faa': 'H/A20N/L',
+            'aircraft_short': rnd.choice(('A20N', 'B738', 'A321', 'B77W', 'E190')),
+            'departure': dep,
+            'arrival': arr,
+            'alternate': '',
+            'cruise_tas': '450',
+            'altitude': '36000',
+            'deptime': f'{rnd.randint(0, 23):02d}{rnd.choice((0, 15, 30, 45)):02d}',
+            'enroute_time': f'{rnd.randint(0, 11):02d}{rnd.randint(0, 59):02d}',
+            'fuel_time': '0500',
+            'remarks': 'PBN/A1B1C1D1L1O1S1 DOF/260101 REG/DSYNT /V/',
+            'route': 'DCT ABCDE UL612 FGHIJ UN850 KLMNO DCT',
+            'revision_id': 1,
+            'assigned_transponder': '0000',
+        },
+        'logon_time': f'2026-01-01T{rnd.randint(8, 11):02d}:00:00.0000000Z',
+        'last_updated': '2026-01-01T12:00:00.0000000Z',
+    }
+
+
+def make_feed(size: int, seed: int, fetcher: VatsimFetcher) -> bytes:
+    rnd = random.Random(seed)
+    coords = airport_coords(fetcher.stands)
+    boards = [icao for icao in fetcher.configured_airports if icao in coords]
+    phases = [name for name, _ in PHASE_MIX] + ['enroute']
+    weights = [share for _, share in PHASE_MIX] + [1 - sum(share for _, share in PHASE_MIX)]
+    pilots = []
+    for i in range(size):
+        phase = rnd.choices(phases, weights)[0]
+        board = rnd.choice(boards)
+        other = rnd.choice([c for c in boards + list(OTHER_AIRPORTS) if c != board])
+        pilots.append(make_pilot(rnd, i, phase, board, other, coords, fetcher.stands))
+    controllers = [
+        {'cid': 1, 'name': 'Synthetic', 'callsign': f'{icao}_TWR', 'frequency': '118.100',
+         'facility': 4, 'rating': 5, 'server': 'SYNTH', 'visual_range': 50,
+         'text_atis': None, 'last_updated': '', 'logon_time': ''}
+        for icao in boards
+    ]
+    feed = {
+        'general': {'version': 3, 'update_timestamp': f'synthetic-{size}-{seed}', 'connected_clients': size},
+        'pilots': pilots,
+        'controllers': controllers,
+        'atis': [],
+        'servers': [],
+        'prefiles': [],
+        'facilities': [],
+        'ratings': [],
+        'pilot_ratings': [],
+        'military_ratings': [],
+    }
+    return json.dumps(feed).encode('utf-8')
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """
+    Time func `repeat` times, then run it once more under tracemalloc for peak
+    allocations. setup, if given, runs untimed before every run.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000.0)
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'peak_kb': round(peak / 1024.0, 1),
+    }
+
+
+def board_candidates(fetcher: VatsimFetcher, airport_infos: Dict[str, Dict]) -> List[Tuple[Dict, str, str, Dict]]:
+    candidates = []
+    index = fetcher.snapshot['index']
+    for code, info in airport_infos.items():
+        for direction in ('DEP', 'ARR'):
+            for pilot in index.get(code, {}).get(direction, []):
+                candidates.append((pilot, code, direction, info))
+    return candidates
+
+
+def bench_size(fetcher: VatsimFetcher, size: int, seed: int, repeat: int) -> Dict[str, Dict]:
+    body = make_feed(size, seed, fetcher)
+    airport_infos = fetcher.resolve_airports()
+    results: Dict[str, Dict] = {'feed_mb': round(len(body) / 1e6, 2)}
+
+    results['parse'] = measure(lambda: fetcher._parse_feed(io.BytesIO(body), None), repeat)
+    data = fetcher._parse_feed(io.BytesIO(body), None)
+    fetcher._pending_validators = {}
+    results['load_snapshot'] = measure(lambda: fetcher._load_snapshot(data), repeat)
+
+    candidates = board_candidates(fetcher, airport_infos)
+    ground = [(p, code) for p, code, _, info in candidates if info.get('has_stands')]
+
+    def run_find_stand():
+        for pilot, code in ground:
+            fetcher.find_stand(pilot['latitude'], pilot['longitude'], code,
+                               pilot['groundspeed'], pilot['altitude'], pilot['callsign'])
+
+    index = fetcher.snapshot['index']
+
+    def run_match_stands():
+        for code, info in airport_infos.items():
+            if info.get('has_stands'):
+                pilots = index.get(code, {})
+                fetcher.match_stands(code, pilots.get('DEP', []) + pilots.get('ARR', []))
+
+    def run_format_flight():
+        for pilot, code, direction, info in candidates:
+            dist_km = fetcher.calculate_distance_m(pilot['latitude'], pilot['longitude'], info['lat'], info['lon']) / 1000.0
+            fetcher.format_flight(pilot, direction, info['ceiling'], code, dist_km, info.get('has_stands', False))
+
+    def run_process_flight():
+        for pilot, code, direction, info in candidates:
+            board = {'departures': [], 'arrivals': []}
+            fetcher.process_flight(pilot, code, direction, board, info)
+
+    boards = fetcher.build_boards(airport_infos)
+
+    def run_sort():
+        for board in boards.values():
+            sorted(board['departures'], key=lambda x: fetcher._get_sortable_time(x.get('time_display', '')))
+            sorted(board['arrivals'], key=fetcher._arrival_sort_key)
+
+    results['find_stand'] = measure(run_find_stand, repeat)
+    # Cold runs geofence every pilot; warm runs hit the sticky stand cache
+    # the way consecutive update cycles do. Stand indexes stay built in both.
+    results['match_stands'] = measure(run_match_stands, repeat, setup=lambda: fetcher._stand_cache.clear())
+    results['match_stands_warm'] = measure(run_match_stands, repeat, setup=run_match_stands)
+    results['format_flight'] = measure(run_format_flight, repeat)
+    results['process_flight'] = measure(run_process_flight, repeat)
+    results['sort'] = measure(run_sort, repeat)
+    results['build_boards'] = measure(lambda: fetcher.build_boards(airport_infos), repeat)
+    results['counts'] = {
+        'pilots': size,
+        'board_candidates': len(candidates),
+        'ground_lookups': len(ground),
+        'rows_displayed': sum(len(b['departures']) + len(b['arrivals']) for b in boards.values()),
+    }
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> int:
+    """Print per-stage ratios against a baseline report; returns the number of regressions."""
+    regressions = 0
+    for size, stages in current['results'].items():
+        base_stages = baseline.get('results', {}).get(size)
+        if not base_stages:
+            continue
+        print(f"\n{size} pilots (current vs baseline median):")
+        for stage, stats in stages.items():
+            base = base_stages.get(stage)
+            if not isinstance(stats, dict) or 'median_ms' not in stats or not base:
+                continue
+            ratio = stats['median_ms'] / base['median_ms'] if base['median_ms'] else float('inf')
+            flag = ''
+            if ratio > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print(f"  {stage:<17} {base['median_ms']:>10.2f} -> {stats['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    for size, stages in report['results'].items():
+        counts = stages.get('counts', {})
+        print(f"\n{size} pilots ({stages['feed_mb']} MB feed, {counts.get('board_candidates')} board candidates, "
+              f"{counts.get('rows_displayed')} rows displayed):")
+        for stage, stats in stages.items():
+            if isinstance(stats, dict) and 'median_ms' in stats:
+                print(f"  {stage:<17} median {stats['median_ms']:>10.2f} ms   min {stats['min_ms']:>10.2f} ms   "
+                      f"peak {stats['peak_kb']:>10.1f} KiB")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the flight board hot path on synthetic feeds.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated pilot counts (default: 2000,10000,50000).",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per stage (default: 3).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed for feed generation.")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path.")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Median slowdown ratio counted as a regression in --compare (default: 1.25).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    clock.freeze(FROZEN_NOW)
+    fetcher = make_fetcher()
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        print(f"Benchmarking {size} pilots...")
+        report['results'][str(size)] = bench_size(fetcher, size, args.seed, args.repeat)
+    clock.unfreeze()
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nWrote report to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} stage(s) slower than x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,7 +4,7 @@ Import airport stand positions from OpenStreetMap (Overpass API) and convert the
 to the project's stand schema.
 
 Default behavior generates an isolated output file for manual QA/fixes first.
-Optionally, you can merge the result directly into static/stands.json.
+Optionally, you can write the result directly to the airport's file in static/stands/.
 """
 
 from __future__ import annotations
@@ -12,15 +12,20 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stand_store import shard_path, write_shard  # noqa: E402
+
 
 DEFAULT_OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 DEFAULT_OUTPUT_PATH = Path("static/eham_stands.generated.json")
-DEFAULT_STANDS_PATH = Path("static/stands.json")
+DEFAULT_STANDS_DIR = Path("static/stands")
 EHAM_ALLOWED_PREFIXES = set("ABCDEFGHJKMPRSUY")
 
 
@@ -130,12 +135,6 @@ def write_generated_output(output_path: Path, icao: str, stands: List[Dict]) ->
     output_path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
 
 
-def merge_into_stands_json(stands_path: Path, icao: str, stands: List[Dict]) -> None:
-    data = json.loads(stands_path.read_text(encoding="utf-8"))
-    data[icao] = stands
-    stands_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
-
-
 def apply_airport_specific_filters(icao: str, stands: List[Dict]) -> List[Dict]:
     # EHAM chart convention: only specific stand families are in use.
     if icao == "EHAM":
@@ -156,7 +155,7 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help=(
             "Generated output path. Defaults to "
-            f"{DEFAULT_OUTPUT_PATH} unless --update-stands-json is used."
+            f"{DEFAULT_OUTPUT_PATH} unless --update-stands is used."
         ),
     )
     parser.add_argument(
@@ -166,14 +165,21 @@ def parse_args() -> argparse.Namespace:
         help="HTTP timeout seconds (default: 60).",
     )
     parser.add_argument(
+        "--update-stands",
         "--update-stands-json",
+        dest="update_stands",
         action="store_true",
-        help=f"Also write/replace ICAO block in {DEFAULT_STANDS_PATH}.",
+        help=f"Also write/replace <ICAO>.json in {DEFAULT_STANDS_DIR}.",
     )
     parser.add_argument(
+        "--stands-dir",
         "--stands-path",
-        default=str(DEFAULT_STANDS_PATH),
-        help=f"Path to master stands JSON (default: {DEFAULT_STANDS_PATH}).",
+        dest="stands_dir",
+        default=str(DEFAULT_STANDS_DIR),
+        help=(
+            f"Directory of per-airport stand files (default: {DEFAULT_STANDS_DIR}). "
+            "A legacy stands.json path means the stands/ directory next to it."
+        ),
     )
     return parser.parse_args()
 
@@ -182,9 +188,11 @@ def main() -> int:
     args = parse_args()
     icao = args.icao.upper().strip()
     output_path = Path(args.output) if args.output else None
-    if output_path is None and not args.update_stands_json:
+    if output_path is None and not args.update_stands:
         output_path = DEFAULT_OUTPUT_PATH
-    stands_path = Path(args.stands_path)
+    stands_dir = Path(args.stands_dir)
+    if stands_dir.suffix == ".json":
+        stands_dir = stands_dir.with_suffix("")  # static/stands.json -> static/stands
 
     query = build_query(icao)
     payload = fetch_overpass(query, args.overpass_url, args.timeout)
@@ -196,9 +204,9 @@ def main() -> int:
         print(f"Generated {len(stands)} stands for {icao} -> {output_path}")
     print(f"Skipped elements without usable name/coords: {skipped}")
 
-    if args.update_stands_json:
-        merge_into_stands_json(stands_path, icao, stands)
-        print(f"Updated {stands_path} with {icao} stands.")
+    if args.update_stands:
+        write_shard(stands_dir, icao, stands)
+        print(f"Updated {shard_path(stands_dir, icao)} with {icao} stands.")
 
     return 0
 
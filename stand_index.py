@@ -0,0 +1,92 @@
+"""
+Spatial index for stand geofencing
+Buckets an airport's stands into a grid in a local metric projection so a
+position lookup only measures the stands in the neighbouring cells
+"""
+
+import math
+
+EARTH_RADIUS_M = 6371000
+DEFAULT_RADIUS_M = 40
+MIN_CELL_M = 50  # Keeps the grid coarse at airports with very small stand radii
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres (same formula as VatsimFetcher.calculate_distance_m)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
+    c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return EARTH_RADIUS_M*c
+
+
+class StandIndex:
+    def __init__(self, stands):
+        self.stands = stands  # The list this index was built from
+
+        # Stands are (position in list, name, lat, lon, radius); stands without
+        # coordinates can never match a pilot so they are left out
+        entries = []
+        for position, stand in enumerate(stands):
+            lat, lon = stand.get('lat'), stand.get('lon')
+            if lat is None or lon is None:
+                continue
+            entries.append((position, stand['name'], lat, lon, stand.get('radius', DEFAULT_RADIUS_M)))
+
+        self.size = len(entries)
+        if not entries:
+            self.cells = {}
+            return
+
+        # Equirectangular projection around the stands' centroid. Over an
+        # airport's few kilometres it is accurate to well under a metre; the
+        # cell size carries a 10% margin so no stand within its radius is missed.
+        self.lat0 = sum(e[2] for e in entries) / len(entries)
+        self.lon0 = sum(e[3] for e in entries) / len(entries)
+        self.kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(self.lat0))
+        self.ky = math.radians(1) * EARTH_RADIUS_M
+        self.cell = max(MIN_CELL_M, max(e[4] for e in entries) * 1.1)
+
+        # (cx, cy) -> [entry, ...] in stand list order
+        self.cells = {}
+        for entry in entries:
+            self.cells.setdefault(self._cell_of(entry[2], entry[3]), []).append(entry)
+
+    def _cell_of(self, lat, lon):
+        x = (lon - self.lon0) * self.kx
+        y = (lat - self.lat0) * self.ky
+        return (math.floor(x / self.cell), math.floor(y / self.cell))
+
+    def nearest(self, lat, lon):
+        """
+        Returns: name of the closest stand whose radius contains (lat, lon),
+        or None. Ties go to the stand listed first, as in a full scan.
+        """
+        if not self.cells:
+            return None
+        cx, cy = self._cell_of(lat, lon)
+        candidates = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                bucket = self.cells.get((cx + dx, cy + dy))
+                if bucket:
+                    candidates.extend(bucket)
+        if not candidates:
+            return None
+        candidates.sort()
+
+        closest_stand = None
+        min_distance = float('inf')
+        for _, name, stand_lat, stand_lon, radius in candidates:
+            dist = haversine_m(lat, lon, stand_lat, stand_lon)
+            if dist <= radius and dist < min_distance:
+                min_distance = dist
+                closest_stand = name
+        return closest_stand
+
+    def nearest_many(self, positions):
+        """Returns: list of nearest() results, one per (lat, lon) in positions"""
+        nearest = self.nearest
+        return [nearest(lat, lon) for lat, lon in positions]
+
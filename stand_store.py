@@ -0,0 +1,250 @@
+"""
+Stand database
+Stands are kept as one editable JSON file per airport (static/stands/<ICAO>.json),
+written atomically so one airport can be saved without touching the others.
+The shards are compiled into a compact binary table (stands.bin) that is
+memory-mapped at startup, so reloads only re-parse JSON when it has changed
+and worker processes share the pages
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from collections.abc import MutableMapping
+
+MAGIC = b'FBST'
+FORMAT_VERSION = 2
+
+SHARD_PATTERN = re.compile(r'^([A-Z0-9]{3,8})\.json$')
+
+# magic, version, reserved, source stamp, source size, airport count,
+# type count, types offset, records offset, names offset
+HEADER = struct.Struct('<4sHHqqIIIII')
+# icao (NUL padded), first record, record count
+AIRPORT = struct.Struct('<8sII')
+# lat, lon, radius (NaN = missing), name offset, name length, type index (255 = missing)
+RECORD = struct.Struct('<dddIHB')
+NO_TYPE = 255
+
+
+def _atomic_write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def shard_path(stands_dir, icao):
+    return os.path.join(stands_dir, f'{icao}.json')
+
+
+def list_shards(stands_dir):
+    """Returns: dict of {icao: shard path} for every airport file in stands_dir"""
+    shards = {}
+    for filename in sorted(os.listdir(stands_dir)):
+        match = SHARD_PATTERN.match(filename)
+        if match:
+            shards[match.group(1)] = os.path.join(stands_dir, filename)
+    return shards
+
+
+def read_shard(stands_dir, icao):
+    """Returns: the stand list saved for icao, or [] if there is none"""
+    try:
+        with open(shard_path(stands_dir, icao), 'r', encoding='utf-8') as f:
+            stands = json.load(f)
+        return stands if isinstance(stands, list) else []
+    except (OSError, ValueError):
+        return []
+
+
+def write_shard(stands_dir, icao, stands):
+    """Atomically replace one airport's stand file (one stand object per line for easy review)."""
+    os.makedirs(stands_dir, exist_ok=True)
+    lines = [f'  {json.dumps(stand, ensure_ascii=True)}' for stand in stands]
+    text = '[\n' + ',\n'.join(lines) + '\n]\n' if lines else '[]\n'
+    _atomic_write(shard_path(stands_dir, icao), text.encode('utf-8'))
+
+
+def migrate_stands_json(json_path, stands_dir):
+    """Split a legacy single stands.json into per-airport files."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        stands = json.load(f)
+    for icao, airport_stands in stands.items():
+        write_shard(stands_dir, icao, airport_stands)
+    print(f"Migrated {len(stands)} airports from {json_path} to {stands_dir}/")
+
+
+def source_stamp(shards):
+    """Returns: (stamp, total size) identifying the current contents of the shard files"""
+    digest = hashlib.blake2b(digest_size=8)
+    total = 0
+    for icao, path in sorted(shards.items()):
+        stat = os.stat(path)
+        digest.update(f'{icao}:{stat.st_mtime_ns}:{stat.st_size};'.encode('ascii'))
+        total += stat.st_size
+    return int.from_bytes(digest.digest(), 'little', signed=True), total
+
+
+def compiled_path(stands_dir):
+    return os.path.normpath(stands_dir) + '.bin'
+
+
+def compile_stands(stands, bin_path, stamp=(0, 0)):
+    """
+    Write stands ({icao: [stand, ...]}) as a compiled table to bin_path,
+    atomically. stamp is the source_stamp() of the shards it came from.
+    """
+    types, type_ids = [], {}
+    names = bytearray()
+    directory = bytearray()
+    records = bytearray()
+    count = 0
+    for icao, airport_stands in stands.items():
+        directory += AIRPORT.pack(icao.encode('ascii'), count, len(airport_stands))
+        for stand in airport_stands:
+            name = str(stand.get('name', '')).encode('utf-8')
+            stand_type = stand.get('type')
+            if stand_type is None:
+                type_id = NO_TYPE
+            else:
+                type_id = type_ids.get(stand_type)
+                if type_id is None:
+                    type_id = type_ids[stand_type] = len(types)
+                    types.append(stand_type)
+
+            def number(key):
+                value = stand.get(key)
+                return math.nan if value is None else float(value)
+
+            records += RECORD.pack(number('lat'), number('lon'), number('radius'), len(names), len(name), type_id)
+            names += name
+            count += 1
+
+    type_table = bytearray()
+    for stand_type in types:
+        encoded = stand_type.encode('utf-8')
+        type_table += bytes([len(encoded)]) + encoded
+
+    types_offset = HEADER.size + len(directory)
+    records_offset = types_offset + len(type_table)
+    names_offset = records_offset + len(records)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, stamp[0], stamp[1],
+        len(stands), len(types), types_offset, records_offset, names_offset,
+    )
+    _atomic_write(bin_path, bytes(header + directory + type_table + records + names))
+
+
+class StandStore(MutableMapping):
+    """
+    Dict-like view over a compiled stand table. Airports are
+    decoded into stand dicts on first access and kept, so repeated lookups
+    return the same list object. Stands set at runtime (e.g. from OSM) are
+    held in memory on top of the compiled table.
+    """
+
+    def __init__(self, bin_path):
+        with open(bin_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.source_stamp, self.source_size, airport_count,
+         type_count, types_offset, self._records_offset, self._names_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f'{bin_path} is not a compiled stand table (version {FORMAT_VERSION})')
+
+        self._airports = {}  # icao -> (first record, count)
+        for i in range(airport_count):
+            raw_icao, first, count = AIRPORT.unpack_from(self._mm, HEADER.size + i * AIRPORT.size)
+            self._airports[raw_icao.rstrip(b'\0').decode('ascii')] = (first, count)
+
+        self._types = []
+        offset = types_offset
+        for _ in range(type_count):
+            length = self._mm[offset]
+            self._types.append(self._mm[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+
+        self._decoded = {}
+
+    def matches_source(self, stamp):
+        return (self.source_stamp, self.source_size) == stamp
+
+    def _decode(self, icao):
+        first, count = self._airports[icao]
+        start = self._records_offset + first * RECORD.size
+        view = memoryview(self._mm)[start:start + count * RECORD.size]
+        names = self._names_offset
+        stands = []
+        for lat, lon, radius, name_offset, name_length, type_id in RECORD.iter_unpack(view):
+            stand = {
+                'name': self._mm[names + name_offset:names + name_offset + name_length].decode('utf-8'),
+                'lat': None if math.isnan(lat) else lat,
+                'lon': None if math.isnan(lon) else lon,
+            }
+            if not math.isnan(radius): stand['radius'] = radius
+            if type_id != NO_TYPE: stand['type'] = self._types[type_id]
+            stands.append(stand)
+        view.release()
+        return stands
+
+    def __getitem__(self, icao):
+        stands = self._decoded.get(icao)
+        if stands is None:
+            if icao not in self._airports:
+                raise KeyError(icao)
+            stands = self._decoded[icao] = self._decode(icao)
+        return stands
+
+    def __setitem__(self, icao, stands):
+        self._decoded[icao] = stands
+
+    def __delitem__(self, icao):
+        if icao not in self:
+            raise KeyError(icao)
+        self._decoded.pop(icao, None)
+        self._airports.pop(icao, None)
+
+    def __contains__(self, icao):
+        return icao in self._decoded or icao in self._airports
+
+    def __iter__(self):
+        return iter(dict.fromkeys([*self._airports, *self._decoded]))
+
+    def __len__(self):
+        return len(self._airports) + sum(1 for icao in self._decoded if icao not in self._airports)
+
+    def close(self):
+        self._mm.close()
+
+
+def load_stand_store(stands_dir):
+    """
+    Returns: a StandStore for the shards in stands_dir, (re)compiling it
+    first when the compiled table is missing or the shards have changed.
+    Falls back to a dict of the parsed shards if the table can't be written.
+    """
+    shards = list_shards(stands_dir)
+    stamp = source_stamp(shards)
+    bin_path = compiled_path(stands_dir)
+    try:
+        store = StandStore(bin_path)
+        if store.matches_source(stamp):
+            return store
+        store.close()
+    except (OSError, ValueError, struct.error):
+        pass
+
+    stands = {icao: read_shard(stands_dir, icao) for icao in shards}
+    try:
+        compile_stands(stands, bin_path, stamp)
+        return StandStore(bin_path)
+    except OSError as e:
+        print(f"Could not compile {bin_path} ({e}); using {stands_dir}/ directly")
+        return stands
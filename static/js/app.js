@@ -106,6 +106,11 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     const socket = io();
+    const boardSync = new window.BoardSync(socket, {
+        encoding: 'columnar',
+        getAirport: () => currentAirport,
+        onBoard: (data) => handleFlightUpdate(data)
+    });
     let flightTracker = null;
     let lastTouchTrackToggleAt = 0;
 
@@ -170,7 +175,8 @@ document.addEventListener('DOMContentLoaded', () => {
         if (mapLink) mapLink.href = '/map/' + currentAirport;
 
         if (changed) {
-            socket.emit('join_airport', { airport: currentAirport });
+            boardSync.reset();
+            socket.emit('join_airport', { airport: currentAirport, encoding: boardSync.encoding });
             elements.departureList.innerHTML = '';
             elements.arrivalList.innerHTML = '';
             applyPagination('dep', true);
@@ -190,11 +196,11 @@ document.addEventListener('DOMContentLoaded', () => {
     // --- SOCKET LISTENER ---
     socket.on('connect', () => {
         console.log('Connected via WebSockets. Joining:', currentAirport);
-        socket.emit('join_airport', { airport: currentAirport, explicit: initialAirportExplicit });
+        socket.emit('join_airport', { airport: currentAirport, explicit: initialAirportExplicit, encoding: boardSync.encoding });
         initialAirportExplicit = true; // subsequent reconnects count as returning visitor
     });
 
-    socket.on('flight_update', (data) => {
+    function handleFlightUpdate(data) {
         console.log('Flight update received:', data);
         console.log('Country from data:', data.country); // DEBUG
         rawFlightData = data;
@@ -212,7 +218,7 @@ document.addEventListener('DOMContentLoaded', () => {
         renderSection('dep');
         renderSection('arr');
         refreshTrackedRowHighlights();
-    });
+    }
 
     if (window.FlightTracker) {
         flightTracker = new window.FlightTracker({
@@ -0,0 +1,112 @@
+(function attachBoardSync(global) {
+    const ROW_LISTS = ['departures', 'arrivals'];
+    const COLUMNAR = 'columnar';
+    const decoder = new TextDecoder();
+
+    // Boards arrive as pre-encoded JSON bytes (an ArrayBuffer)
+    function decode(data) {
+        if (data instanceof ArrayBuffer || ArrayBuffer.isView(data)) {
+            return JSON.parse(decoder.decode(data));
+        }
+        return data;
+    }
+
+    // Columnar lists are { k: [keys], r: [[values], ...] }
+    function expandRows(table) {
+        return table.r.map((values) => {
+            const row = {};
+            table.k.forEach((key, i) => { row[key] = values[i]; });
+            return row;
+        });
+    }
+
+    function expandColumnar(message) {
+        if (message.encoding !== COLUMNAR) return message;
+        const expanded = Object.assign({}, message);
+        delete expanded.encoding;
+        ROW_LISTS.forEach((key) => {
+            const list = message[key];
+            if (!list) return;
+            expanded[key] = list.k
+                ? expandRows(list)
+                : Object.assign({}, list, { added: expandRows(list.added), changed: expandRows(list.changed) });
+        });
+        return expanded;
+    }
+
+    function applyRows(rows, delta) {
+        const byCallsign = new Map(rows.map((row) => [row.callsign, row]));
+        (delta.removed || []).forEach((callsign) => byCallsign.delete(callsign));
+        (delta.added || []).forEach((row) => byCallsign.set(row.callsign, row));
+        (delta.changed || []).forEach((row) => byCallsign.set(row.callsign, row));
+
+        // Without an order the rows only changed in place
+        const order = delta.order || rows.map((row) => row.callsign);
+        return order.map((callsign) => byCallsign.get(callsign)).filter(Boolean);
+    }
+
+    // Keeps the current airport's board in sync from flight_update (full
+    // board + seq) and flight_delta (rows keyed by callsign) events, and asks
+    // for a fresh snapshot when a delta is missed. Pages pass `encoding` in
+    // join_airport: plain JSON by default, or { encoding: 'columnar' } for the
+    // compact column format (no route strings).
+    class BoardSync {
+        constructor(socket, options) {
+            const opts = options || {};
+            this.socket = socket;
+            this.encoding = opts.encoding || 'json';
+            this.getAirport = opts.getAirport || (() => '');
+            this.onBoard = typeof opts.onBoard === 'function' ? opts.onBoard : () => {};
+            this.board = null;
+            this.seq = 0;
+            this.resyncPending = false;
+
+            socket.on('flight_update', (data) => this.handleSnapshot(expandColumnar(decode(data))));
+            socket.on('flight_delta', (delta) => this.handleDelta(expandColumnar(decode(delta))));
+        }
+
+        isCurrent(airport) {
+            return !airport || airport === String(this.getAirport()).toUpperCase();
+        }
+
+        reset() {
+            this.board = null;
+            this.seq = 0;
+            this.resyncPending = false;
+        }
+
+        handleSnapshot(data) {
+            if (!this.isCurrent(data.airport)) return;
+            this.board = data;
+            this.seq = data.seq || 0;
+            this.resyncPending = false;
+            this.onBoard(this.board);
+        }
+
+        handleDelta(delta) {
+            if (!this.isCurrent(delta.airport)) return;
+            if (this.board && delta.seq <= this.seq) return; // Already in the snapshot we hold
+            if (!this.board || delta.seq !== this.seq + 1) {
+                this.resync();
+                return;
+            }
+
+            const board = Object.assign({}, this.board, delta.meta || {});
+            ROW_LISTS.forEach((key) => {
+                if (delta[key]) board[key] = applyRows(this.board[key] || [], delta[key]);
+            });
+            board.seq = delta.seq;
+            this.board = board;
+            this.seq = delta.seq;
+            this.onBoard(board);
+        }
+
+        resync() {
+            if (this.resyncPending) return;
+            this.resyncPending = true;
+            this.socket.emit('resync_airport', { airport: String(this.getAirport()).toUpperCase() });
+        }
+    }
+
+    global.BoardSync = BoardSync;
+})(window);
@@ -275,10 +275,16 @@
     var receivedFirst = false;
 
     socket.on('connect', function () {
-        socket.emit('join_airport', { airport: AIRPORT, explicit: false });
+        socket.emit('join_airport', { airport: AIRPORT, explicit: false, encoding: boardSync.encoding });
     });
 
-    socket.on('flight_update', function (data) {
+    var boardSync = new window.BoardSync(socket, {
+        encoding: 'columnar',
+        getAirport: function () { return AIRPORT; },
+        onBoard: handleBoard
+    });
+
+    function handleBoard(data) {
         var result = findFlight(data);
         if (result) {
             renderMonitor(result.flight, result.isDep);
@@ -286,5 +292,5 @@
             showNotFound();
         }
         receivedFirst = true;
-    });
+    }
 })();
@@ -60,7 +60,7 @@
             .map(function (p) { return { type: p.toLowerCase(), letter: posLetter[p], callsign: seenPos[p].callsign, freq: seenPos[p].freq }; });
     }
 
-    /* ── Airport features (OSM Overpass + stands.json) ──────── */
+    /* ── Airport features (OSM Overpass + stand occupancy) ──── */
     function calcBearing(lat1, lon1, lat2, lon2) {
         var dLon = (lon2 - lon1) * Math.PI / 180;
         var y = Math.sin(dLon) * Math.cos(lat2 * Math.PI / 180);
@@ -97,20 +97,39 @@
         }).addTo(runwayLabelGroup);
     }
 
+    // Stands served by the occupancy API: name -> { marker, callsign }
+    var standMarkers = {};
+
+    function standIcon(label, occupied) {
+        return L.divIcon({
+            className: '',
+            html: '<div class="map-stand-label' + (occupied ? ' occupied' : '') + '">' + label + '</div>',
+            iconSize: [0, 0],
+            iconAnchor: [0, 0],
+        });
+    }
+
     function renderStands(stands) {
         stands.forEach(function (s) {
             if (s.lat == null || s.lon == null) return;
             var label = s.name || s.ref || '';
             if (!label) return;
-            L.marker([s.lat, s.lon], {
-                icon: L.divIcon({
-                    className: '',
-                    html: '<div class="map-stand-label">' + label + '</div>',
-                    iconSize: [0, 0],
-                    iconAnchor: [0, 0],
-                }),
+            var marker = L.marker([s.lat, s.lon], {
+                icon: standIcon(label, s.occupied),
                 interactive: false,
             }).addTo(standGroup);
+            if (s.occupied !== undefined) standMarkers[label] = { marker: marker, callsign: s.callsign || null };
+        });
+    }
+
+    // occupancy: { standName: callsign } pushed with each flight_update
+    function applyStandOccupancy(occupancy) {
+        Object.keys(standMarkers).forEach(function (name) {
+            var entry = standMarkers[name];
+            var callsign = occupancy[name] || null;
+            if (callsign === entry.callsign) return;
+            entry.callsign = callsign;
+            entry.marker.setIcon(standIcon(name, !!callsign));
         });
     }
 
@@ -197,11 +216,14 @@
             + ');out geom;';
 
         // Stands are fetched and rendered independently — OSM failure won't block them
-        var standsP = fetch('/static/stands.json').then(function (r) { return r.json(); }).catch(function () { return {}; });
-        standsP.then(function (standsJson) {
-            var useLocalStands = !!(standsJson[AIRPORT] && standsJson[AIRPORT].length);
+        var standsP = fetch('/api/stands/' + AIRPORT + '/occupancy')
+            .then(function (r) { return r.ok ? r.json() : {}; })
+            .catch(function () { return {}; });
+        standsP.then(function (occupancy) {
+            var localStands = occupancy.stands || [];
+            var useLocalStands = !!(localStands && localStands.length);
             if (useLocalStands) {
-                renderStands(standsJson[AIRPORT]);
+                renderStands(localStands);
                 updateFeatureVisibility();
             }
 
@@ -895,13 +917,35 @@
         document.getElementById('panelAlt').textContent = (f.altitude || 0).toLocaleString() + ' ft';
         document.getElementById('panelSpeed').textContent = (f.groundspeed || 0) + ' kts';
         document.getElementById('panelGate').textContent = f.gate || '--';
-        document.getElementById('panelRoute').textContent = f.route || '--';
+        if (f.route !== undefined) document.getElementById('panelRoute').textContent = f.route || '--';
+        else loadPanelRoute(f.callsign);
         document.getElementById('panelGateLink').href = '/gate/' + AIRPORT + '/' + f.callsign;
         panel.classList.add('open');
     }
 
+    // Compact board updates leave out routes; fetch the selected flight's on demand
+    var panelRoutes = {};
+
+    function loadPanelRoute(callsign) {
+        var routeEl = document.getElementById('panelRoute');
+        if (Object.prototype.hasOwnProperty.call(panelRoutes, callsign)) {
+            if (panelRoutes[callsign] !== null) routeEl.textContent = panelRoutes[callsign] || '--';
+            return;
+        }
+        panelRoutes[callsign] = null; // Request in flight
+        routeEl.textContent = '--';
+        fetch('/api/flight/' + encodeURIComponent(callsign))
+            .then(function (r) { return r.json(); })
+            .then(function (data) {
+                panelRoutes[callsign] = (data.flight && data.flight.route) || '';
+                if (selectedCallsign === callsign) routeEl.textContent = panelRoutes[callsign] || '--';
+            })
+            .catch(function () { delete panelRoutes[callsign]; });
+    }
+
     function closeFlightPanel() {
         selectedCallsign = null;
+        panelRoutes = {};
         panel.classList.remove('open');
     }
 
@@ -1576,6 +1620,7 @@
             if (!inLocal) allFlights = allFlights.concat([enRouteFd]);
         }
         updateMarkers(allFlights);
+        if (data.stand_occupancy) applyStandOccupancy(data.stand_occupancy);
         updateATC(data.controllers || []);
         updateStats(allFlights.length, (data.controllers || []).length);
 
@@ -1592,10 +1637,14 @@
     }
 
     socket.on('connect', function () {
-        socket.emit('join_airport', { airport: AIRPORT, explicit: false });
+        socket.emit('join_airport', { airport: AIRPORT, explicit: false, encoding: boardSync.encoding });
     });
 
-    socket.on('flight_update', handleUpdate);
+    var boardSync = new window.BoardSync(socket, {
+        encoding: 'columnar',
+        getAirport: function () { return AIRPORT; },
+        onBoard: handleUpdate
+    });
 
     // Initial load via API
     fetch('/api/map/' + AIRPORT)
@@ -4,14 +4,19 @@ Fetches real-time stand assignments from VATSIM UK Controller Panel
 """
 
 import requests
+import threading
 from datetime import datetime, timedelta
+from http_client import client as http
 
 class UKCPStandFetcher:
     def __init__(self):
         self.api_url = 'https://ukcp.vatsim.uk/api/stand/assignment'
-        self.cache = {}
-        self.cache_duration = timedelta(minutes=2)  # Cache for 2 minutes
+        self.cache = {}             # callsign -> assignment info
+        self.by_airport = {}        # airport (None if not sent) -> {callsign: stand_id}
+        self.max_stale = timedelta(minutes=10)      # Serve the last good data at most this long
         self.last_fetch = None
+        self.last_error = None
+        self._fetch_lock = threading.Lock()
         
         # UK airports supported by UKCP
         self.uk_airports = [
@@ -21,73 +26,81 @@ class UKCPStandFetcher:
             'EGNT', 'EGNR', 'EGSH', 'EGGD'           # Regional
         ]
     
-    def should_fetch(self):
-        """Check if we need to refresh the cache"""
-        if self.last_fetch is None:
-            return True
-        return datetime.utcnow() - self.last_fetch > self.cache_duration
-    
-    def fetch_stand_assignments(self):
+    def refresh(self):
         """
-        Fetch all stand assignments from UKCP API
-        Returns: dict of {callsign: stand_assignment_data}
+        Fetch all stand assignments from the UKCP API and swap in new
+        lookup tables. Meant to run as its own background job: lookups keep
+        serving the previous tables (stale-while-revalidate) until this
+        completes, and a failed fetch leaves them in place.
+        Returns: True if the tables were replaced
         """
-        if not self.should_fetch():
-            return self.cache
+        # Another thread is already refreshing
+        if not self._fetch_lock.acquire(blocking=False):
+            return False
         
         try:
             # UKCP has CORS restrictions, so this MUST be server-side
-            response = requests.get(
+            response = http.get(
                 self.api_url,
-                timeout=5,
-                headers={
-                    'User-Agent': 'VATSIM-FlightBoard/1.0',
-                    'Accept': 'application/json'
-                }
+                headers={'Accept': 'application/json'}
             )
             
             if response.status_code == 200:
                 data = response.json()
                 
                 # Process the response into a usable format
-                self.cache = {}
+                cache = {}
+                by_airport = {}
                 for assignment in data:
                     callsign = assignment.get('callsign')
                     if callsign:
-                        self.cache[callsign] = {
+                        info = {
                             'stand': assignment.get('stand_id'),
                             'airport': assignment.get('airport'),
                             'type': assignment.get('type', 'arrival'),  # arrival or departure
                             'assigned_at': assignment.get('assigned_at'),
                             'requested': assignment.get('requested', False)
                         }
+                        cache[callsign] = info
+                        by_airport.setdefault(info['airport'], {})[callsign] = info['stand']
                 
+                # Replace whole tables so readers never see a half-built one
+                self.cache, self.by_airport = cache, by_airport
                 self.last_fetch = datetime.utcnow()
-                print(f"UKCP: Fetched {len(self.cache)} stand assignments")
-                return self.cache
+                self.last_error = None
+                print(f"UKCP: Fetched {len(cache)} stand assignments")
+                return True
             else:
+                self.last_error = f"status {response.status_code}"
                 print(f"UKCP API returned status {response.status_code}")
-                return self.cache
+                return False
                 
         except requests.exceptions.Timeout:
+            self.last_error = 'timeout'
             print("UKCP API timeout")
-            return self.cache
+            return False
         except Exception as e:
+            self.last_error = str(e)
             print(f"Error fetching UKCP stands: {e}")
-            return self.cache
+            return False
+        finally:
+            self._fetch_lock.release()
+
+    def _is_expired(self):
+        return self.last_fetch is None or datetime.utcnow() - self.last_fetch > self.max_stale
     
     def get_stand_for_flight(self, callsign, airport_code):
+        """Stand ID assigned to callsign at airport_code, or None. Never does I/O."""
         # Only check UK airports
-        if airport_code not in self.uk_airports:
+        if airport_code not in self.uk_airports or self._is_expired():
             return None
-        
-        assignments = self.fetch_stand_assignments()
-        
-        if callsign in assignments:
-            # The API doesn't send the airport code, so we trust the unique callsign match.
-            return assignments[callsign]['stand']
-            
-        return None
+
+        by_airport = self.by_airport
+        stand = by_airport.get(airport_code, {}).get(callsign)
+        if stand is None:
+            # Assignments sent without an airport code: trust the unique callsign match
+            stand = by_airport.get(None, {}).get(callsign)
+        return stand
     
     def is_uk_airport(self, icao):
         """Check if an airport is covered by UKCP"""
@@ -98,8 +111,9 @@ class UKCPStandFetcher:
         Get full assignment info for a callsign
         Returns dict with stand, airport, type, etc. or None
         """
-        assignments = self.fetch_stand_assignments()
-        return assignments.get(callsign)
+        if self._is_expired():
+            return None
+        return self.cache.get(callsign)
 
 
 # Example usage in vatsim_fetcher.py:
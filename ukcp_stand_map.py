@@ -0,0 +1,142 @@
+"""
+UKCP stand ID -> identifier mapping (e.g. 1231 -> '1B'), scoped per airport
+Loaded from the bundled static/ukcp_stands.json with the last UKCP stand list
+(cached under data/, untracked) over it, hot-reloaded when either file
+changes and kept current by a refresh job
+"""
+
+import json
+import os
+import sys
+import threading
+from http_client import client as http
+
+
+class UKCPStandMap:
+    def __init__(self, path, cache_path=None, url=None):
+        self.path = path              # bundled mapping, only ever edited by hand
+        self.cache_path = cache_path  # last UKCP stand list saved by refresh()
+        self.url = url                # UKCP stand list endpoint used by refresh()
+        self.tables = {}              # icao -> {int stand id: interned identifier}
+        self.count = 0
+        self.last_error = None
+        self._bundled = {}            # tables from path alone
+        self._mtimes = None
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _build(raw):
+        """Returns: (tables, count) from {icao: [{'id', 'identifier'}, ...]}"""
+        if not isinstance(raw, dict):
+            raise ValueError('UKCP stand list must be an object keyed by airport')
+        tables = {}
+        count = 0
+        for icao, stands in raw.items():
+            table = {}
+            for stand in stands:
+                table[int(stand['id'])] = sys.intern(str(stand['identifier']))
+            tables[sys.intern(icao)] = table
+            count += len(table)
+        return tables, count
+
+    def _mtimes_now(self):
+        mtimes = []
+        for path in (self.path, self.cache_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _read(self, path):
+        """Returns: tables from path, or {} if it doesn't exist"""
+        if not path:
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return self._build(json.load(f))[0]
+        except FileNotFoundError:
+            return {}
+
+    def _swap(self, bundled, fetched):
+        self._bundled = bundled
+        self.tables = {**bundled, **fetched}
+        self.count = sum(len(table) for table in self.tables.values())
+
+    def load(self):
+        """(Re)load the bundled mapping with the cached UKCP list over it. Returns True if it loaded."""
+        mtimes = self._mtimes_now()
+        try:
+            bundled = self._read(self.path)
+            fetched = self._read(self.cache_path)
+        except Exception as e:
+            print(f"Error loading UKCP mapping: {e}")
+            return False
+        if not bundled and not fetched:
+            return False
+        self._swap(bundled, fetched)
+        self._mtimes = mtimes
+        return True
+
+    def reload_if_changed(self):
+        mtimes = self._mtimes_now()
+        if mtimes == self._mtimes or not any(mtimes):
+            return False
+        print("UKCP: stand mapping files changed, reloading")
+        return self.load()
+
+    def refresh(self):
+        """
+        Pull the current stand list from UKCP, swap it in over the bundled
+        mapping and save it to cache_path for the next start. Falls back to
+        reloading the files if they were edited by hand. Returns True if
+        the mapping was replaced.
+        """
+        if not self.url or not self._lock.acquire(blocking=False):
+            return self.reload_if_changed()
+        try:
+            response = http.get(self.url, headers={'Accept': 'application/json'})
+            response.raise_for_status()
+            raw = response.json()
+            tables, count = self._build(raw)
+            if not count:
+                raise ValueError('empty stand list')
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"UKCP: stand list refresh failed: {e}")
+            return self.reload_if_changed()
+        finally:
+            self._lock.release()
+
+        self.last_error = None
+        previous = self.tables
+        self._swap(self._bundled, tables)
+        changed = self.tables != previous
+        if changed and self.cache_path:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+                tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({icao: [{'id': i, 'identifier': ident} for i, ident in table.items()]
+                               for icao, table in tables.items()}, f)
+                os.replace(tmp_path, self.cache_path)
+                self._mtimes = self._mtimes_now()
+            except OSError as e:
+                print(f"UKCP: could not save {self.cache_path}: {e}")
+        if changed:
+            print(f"UKCP: stand mapping updated ({count} stands from UKCP)")
+        return changed
+
+    def identifier(self, icao, stand_id):
+        """Returns: the stand identifier for a UKCP stand id at icao, or None"""
+        table = self.tables.get(icao)
+        if table is None:
+            return None
+        try:
+            return table.get(int(stand_id))
+        except (TypeError, ValueError):
+            return None
+
+    def __len__(self):
+        return self.count
@@ -1,10 +1,18 @@
-import requests
 import math
 import traceback
 import json
 import os
+import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+import clock
 from checkin_assignments import CheckinAssignments
+from metar_fetcher import MetarFetcher
+from stand_index import StandIndex, haversine_m
+from stand_store import load_stand_store, migrate_stands_json
+from ukcp_stand_map import UKCPStandMap
+from http_client import client as http
+from payload_cache import decode_json
 
 CUSTOM_AIRPORTS_PATH = os.path.join('data', 'custom_airports.json')
 
@@ -16,6 +24,65 @@ except ImportError:
     UKCP_AVAILABLE = False
     print("UKCP Stand Fetcher not available")
 
+# Streaming JSON parser for the VATSIM feed: peeks at update_timestamp
+# before a full parse, and can stream the whole feed on low-memory hosts
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Only the feed fields the boards and tracking views actually use
+PILOT_FIELDS = ('callsign', 'latitude', 'longitude', 'altitude', 'groundspeed',
+                'heading', 'transponder', 'logon_time')
+FLIGHT_PLAN_FIELDS = ('departure', 'arrival', 'aircraft_short', 'deptime',
+                      'enroute_time', 'route')
+CONTROLLER_FIELDS = ('callsign', 'frequency')
+
+
+def _trim_pilot(pilot):
+    trimmed = {k: pilot[k] for k in PILOT_FIELDS if k in pilot}
+    fp = pilot.get('flight_plan')
+    trimmed['flight_plan'] = {k: fp.get(k) for k in FLIGHT_PLAN_FIELDS if k in fp} if fp else None
+    return trimmed
+
+
+def _trim_controller(controller):
+    return {k: controller[k] for k in CONTROLLER_FIELDS if k in controller}
+
+
+def _stream_feed(fileobj, known_timestamp=None):
+    """
+    Incrementally parse vatsim-data.json, building one pilot/controller
+    object at a time and keeping only the fields in *_FIELDS. Prefiles,
+    ATIS and the reference tables are never materialised.
+
+    'general' precedes the data arrays in the feed, so if its
+    update_timestamp equals known_timestamp parsing stops early and None
+    is returned.
+    """
+    data = {'general': {}, 'pilots': [], 'controllers': []}
+    targets = {'pilots.item': ('pilots', _trim_pilot),
+               'controllers.item': ('controllers', _trim_controller)}
+    builder = None
+    current = None
+    for prefix, event, value in ijson.parse(fileobj, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == current and event == 'end_map':
+                key, trim = targets[current]
+                data[key].append(trim(builder.value))
+                builder = None
+        elif event == 'start_map' and prefix in targets:
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            current = prefix
+        elif prefix == 'general.update_timestamp':
+            data['general']['update_timestamp'] = value
+            if known_timestamp and value == known_timestamp:
+                return None
+    return data
+
 class VatsimFetcher:
     def __init__(self):
         self.vatsim_url = 'https://data.vatsim.net/v3/vatsim-data.json'
@@ -44,25 +111,72 @@ class VatsimFetcher:
             'EDDF': { 'name': 'Frankfurt Airport', 'ceiling': 5000, 'has_stands': True },
         }
         
-        # Load Geofencing Stands (Coordinate based)
-        self.stands = self.load_stands()
+        # Load Geofencing Stands (Coordinate based) and their spatial indexes
+        self.reload_stands()
         
-        # Load UKCP ID Mapping (ID -> Name based)
-        self.ukcp_mapping = self.load_ukcp_map()
+        # Load UKCP ID Mapping (per airport, ID -> Name based)
+        self.ukcp_mapping = UKCPStandMap(os.path.join('static', 'ukcp_stands.json'),
+                                         os.path.join('data', 'ukcp_stands.json'))
         
         # Initialize Check-in Assignment System
         self.checkin_system = CheckinAssignments()
 
+        # Concurrent, cached METAR retrieval shared by all boards
+        self.metar_fetcher = MetarFetcher()
+
         self._dep_times = {}  # callsign -> "HH:MM" actual UTC departure time
         self._arr_times = {}  # callsign -> "HH:MM" actual UTC arrival time
+        # icao -> (departure callsigns, arrival callsigns) holding actual times on its last board
+        self._timed_callsigns = {}
+
+        # Sticky geofence results for parked aircraft:
+        # (callsign, icao) -> (StandIndex, lat, lon, stand name or None)
+        self._stand_cache = {}
+        self.stand_sticky_m = 5  # Reuse the last stand while the aircraft stays within this distance
 
         self.all_controllers = []  # All online controllers from latest VATSIM fetch
         self.all_pilots = {}       # callsign -> basic position data for all airborne pilots
+        # Latest parsed feed: {'version': int, 'index': {ICAO: {'DEP': [pilots], 'ARR': [pilots]}},
+        # 'controllers': [raw controllers]}. Replaced as a whole so readers never see a mix.
+        self.snapshot = None
+        self.built_version = None  # Snapshot version the last build_boards() used
+        self.board_built = {}      # icao -> (snapshot version, time.time()) of its last board
+
+        # Optional feed record/replay (see feed_recorder.py)
+        self.recorder = None
+        self.replayer = None
+        # Parse the feed object by object with ijson instead of in one go.
+        # Peak memory drops to about 40%, but parsing is about 4x slower.
+        self.stream_feed = False
+
+        # Optional CycleMetrics the app attaches to time each update stage
+        self.metrics = None
+
+        # Feed change detection (ETag / Last-Modified / general.update_timestamp)
+        self._feed_validators = {}
+        self._pending_validators = {}
+        self.feed_stats = {
+            'cycles': 0,
+            'processed': 0,
+            'skipped_not_modified': 0,
+            'skipped_unchanged': 0,
+            'errors': 0,
+            'last_update_timestamp': None,
+        }
         self.fir_map = self.load_fir_map()          # callsign_prefix -> boundary_id
         self.airport_coords = self.load_airport_coords()  # ICAO -> (lat, lon)
 
         self.cleanup_dist_dep = 80
         self.ground_range = 15
+        self.landed_range = 50  # Low and slow arrivals further out than this are 'Scheduled' (not shown)
+
+        # (lat, lon, radius_km) -> (dlat, dlon) half-extents in degrees, see _in_box()
+        self._box_cache = {}
+
+        # Stand occupancy from the last board build: icao -> (snapshot version, {stand: callsign})
+        self.occupancy = {}
+        # icao -> (snapshot version, stand list, payload) for stand_occupancy()
+        self._occupancy_payloads = {}
         
         if UKCP_AVAILABLE:
             self.ukcp_fetcher = UKCPStandFetcher()
@@ -136,7 +250,7 @@ class VatsimFetcher:
 
     def load_airport_database(self):
         try:
-            response = requests.get('https://raw.githubusercontent.com/mwgg/Airports/master/airports.json', timeout=10)
+            response = http.get('https://raw.githubusercontent.com/mwgg/Airports/master/airports.json')
             if response.ok: return response.json()
         except: return {}
         return {}
@@ -195,35 +309,44 @@ class VatsimFetcher:
         return None
     
     def load_stands(self):
-        """Loads the coordinate-based stands for geofencing"""
-        try:
-            stands_path = os.path.join('static', 'stands.json')
-            if not os.path.exists(stands_path): stands_path = 'stands.json'
-            with open(stands_path, 'r') as f: return json.load(f)
-        except: return {}
-
-    def load_ukcp_map(self):
-        """Loads the UKCP ID->Name mapping (e.g. 1231 -> '1B')"""
+        """Loads the coordinate-based stands for geofencing from the compiled stand table"""
         try:
-            # Look for the NEW file you created: static/ukcp_stands.json
-            path = os.path.join('static', 'ukcp_stands.json')
-            if not os.path.exists(path): return {}
-            
-            with open(path, 'r') as f:
-                raw_data = json.load(f)
-            
-            # Flatten the data into a single lookup: {1231: "1B", 461: "1"}
-            mapping = {}
-            for airport, stands in raw_data.items():
-                for stand in stands:
-                    # Map both the integer ID and string ID just in case
-                    mapping[stand['id']] = stand['identifier']
-                    mapping[str(stand['id'])] = stand['identifier']
-            return mapping
+            stands_dir = os.path.join('static', 'stands')
+            if not os.path.isdir(stands_dir):
+                legacy_path = os.path.join('static', 'stands.json')
+                if not os.path.exists(legacy_path): return {}
+                migrate_stands_json(legacy_path, stands_dir)
+            return load_stand_store(stands_dir)
         except Exception as e:
-            print(f"Error loading UKCP mapping: {e}")
+            print(f"Error loading stands: {e}")
             return {}
 
+    def reload_stands(self):
+        """
+        (Re)load the stand database. Each airport's StandIndex is built on
+        first use, so airports stay undecoded in the mapped table until needed.
+        """
+        stands = self.load_stands()
+        self.stand_indexes = {}
+        self.stands = stands
+
+    def set_airport_stands(self, icao, stands):
+        """
+        Install stands for one airport (an admin edit, or fetched from OSM)
+        leaving every other airport untouched. Its index is rebuilt on next use.
+        """
+        self.stand_indexes.pop(icao, None)
+        self.stands[icao] = stands
+
+    def _stand_index(self, airport_code, airport_stands):
+        index = self.stand_indexes.get(airport_code)
+        # Rebuild if the airport's stand list was replaced without going
+        # through reload_stands()/set_airport_stands()
+        if index is None or index.stands is not airport_stands:
+            index = StandIndex(airport_stands)
+            self.stand_indexes[airport_code] = index
+        return index
+
     def calculate_distance_m(self, lat1, lon1, lat2, lon2):
         if None in [lat1, lon1, lat2, lon2]: return 999999
         R = 6371000
@@ -234,7 +357,91 @@ class VatsimFetcher:
         c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R*c
 
-    def find_stand(self, pilot_lat, pilot_lon, airport_code, groundspeed, altitude, callsign=None):
+    def match_stands(self, airport_code, pilots):
+        """
+        Geofence every pilot at an airport in one pass over its StandIndex.
+        Only pilots find_stand() would geofence (slow, low, with a position)
+        are looked up, and an aircraft that has moved less than
+        stand_sticky_m since its last lookup keeps its previous stand.
+
+        Returns: dict of {(lat, lon): stand name or None}, for find_stand(stand_matches=...)
+        """
+        airport_stands = self.stands.get(airport_code)
+        if not airport_stands:
+            return {}
+        index = self._stand_index(airport_code, airport_stands)
+        cache = self._stand_cache
+
+        matches = {}
+        misses = {}  # position -> cache key
+        for p in pilots:
+            lat, lon = p['latitude'], p['longitude']
+            key = (p.get('callsign'), airport_code)
+            if p['groundspeed'] > 15 or p['altitude'] > 10000 or lat is None or lon is None:
+                cache.pop(key, None)
+                continue
+            if (lat, lon) in matches or (lat, lon) in misses:
+                continue
+            entry = cache.get(key)
+            # Entries made against a since-rebuilt index are stale
+            if entry and entry[0] is index and haversine_m(entry[1], entry[2], lat, lon) < self.stand_sticky_m:
+                matches[(lat, lon)] = entry[3]
+            else:
+                misses[(lat, lon)] = key
+
+        for (position, key), stand in zip(misses.items(), index.nearest_many(misses)):
+            matches[position] = stand
+            cache[key] = (index, position[0], position[1], stand)
+        return matches
+
+    def _record_occupancy(self, airport_code, pilots, stand_matches, version):
+        """
+        Derive which stands are occupied (aircraft below 5 kt inside the
+        geofence) from a match_stands() result and remember it for
+        stand_occupancy(). Returns: dict of {stand name: callsign}
+        """
+        occupied = {}
+        for p in pilots:
+            if p['groundspeed'] >= 5: continue
+            stand = stand_matches.get((p['latitude'], p['longitude']))
+            if stand and stand not in occupied:
+                occupied[stand] = p.get('callsign')
+        self.occupancy[airport_code] = (version, occupied)
+        return occupied
+
+    def stand_occupancy(self, airport_code):
+        """
+        Returns: dict with every stand of the airport and whether it is
+        occupied (and by whom) as of the last board build. Cached until the
+        next snapshot or a change to the airport's stands.
+        """
+        airport_stands = self.stands.get(airport_code, [])
+        version, occupied = self.occupancy.get(airport_code, (None, {}))
+        cached = self._occupancy_payloads.get(airport_code)
+        if cached and cached[0] == version and cached[1] is airport_stands:
+            return cached[2]
+
+        stands = []
+        for stand in airport_stands:
+            callsign = occupied.get(stand['name'])
+            stands.append({
+                'name': stand['name'],
+                'lat': stand.get('lat'),
+                'lon': stand.get('lon'),
+                'type': stand.get('type', 'contact'),
+                'occupied': callsign is not None,
+                'callsign': callsign,
+            })
+        payload = {
+            'icao': airport_code,
+            'version': version,
+            'occupied_count': sum(1 for s in stands if s['occupied']),
+            'stands': stands,
+        }
+        self._occupancy_payloads[airport_code] = (version, airport_stands, payload)
+        return payload
+
+    def find_stand(self, pilot_lat, pilot_lon, airport_code, groundspeed, altitude, callsign=None, stand_matches=None):
         # --- PRIORITY 1: UKCP API ---
         if self.ukcp_fetcher and callsign and self.ukcp_fetcher.is_uk_airport(airport_code):
             
@@ -245,7 +452,7 @@ class VatsimFetcher:
                 print(f"[DEBUG] UKCP found ID {ukcp_id} for {callsign}") # <--- DEBUG PRINT
                 
                 # Try to convert to name
-                readable_name = self.ukcp_mapping.get(str(ukcp_id)) or self.ukcp_mapping.get(ukcp_id)
+                readable_name = self.ukcp_mapping.identifier(airport_code, ukcp_id)
                 
                 if readable_name:
                     print(f"[DEBUG] Mapped ID {ukcp_id} -> {readable_name}") # <--- DEBUG PRINT
@@ -260,20 +467,13 @@ class VatsimFetcher:
         if groundspeed > 15 or altitude > 10000: return None
         if pilot_lat is None or pilot_lon is None: return None
         
+        if stand_matches is not None:
+            return stand_matches.get((pilot_lat, pilot_lon))
+
         airport_stands = self.stands.get(airport_code, [])
         if not airport_stands: return None
-            
-        closest_stand = None
-        min_distance = float('inf')
-        
-        for stand in airport_stands:
-            dist = self.calculate_distance_m(pilot_lat, pilot_lon, stand['lat'], stand['lon'])
-            limit = stand.get('radius', 40)
-            if dist <= limit:
-                if dist < min_distance:
-                    min_distance = dist
-                    closest_stand = stand['name']
-        return closest_stand
+
+        return self._stand_index(airport_code, airport_stands).nearest(pilot_lat, pilot_lon)
     
     def _get_sortable_time(self, time_str):
         """
@@ -284,7 +484,7 @@ class VatsimFetcher:
             return datetime.max # Push undefined times to the end
         
         try:
-            now = datetime.utcnow()
+            now = clock.utcnow()
             h, m = map(int, time_str.split(':'))
             # Create a datetime for "today" at this time
             dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
@@ -323,139 +523,306 @@ class VatsimFetcher:
             self._get_sortable_time(flight.get('time_display', ''))
         )
 
-    def fetch_flights(self):
-        results = {}
-        for code in self.configured_airports:
+    def _download_feed(self, conditional=True):
+        """
+        Download and parse the VATSIM v3 data feed, keeping only the pilot
+        and controller fields the boards use. The body is streamed through
+        ijson when stream_feed is set.
+
+        With conditional=True the request carries the ETag/Last-Modified of
+        the current snapshot, and None is returned when the server answers
+        304 or the feed's general.update_timestamp has not moved.
+        """
+        headers = {}
+        if conditional:
+            if self._feed_validators.get('etag'):
+                headers['If-None-Match'] = self._feed_validators['etag']
+            if self._feed_validators.get('last_modified'):
+                headers['If-Modified-Since'] = self._feed_validators['last_modified']
+
+        known_timestamp = self._feed_validators.get('update_timestamp') if conditional else None
+        if self.replayer:
+            response = None
+            with self.replayer.open_current() as f, self._stage('parse'):
+                data = self._parse_feed(f, known_timestamp)
+        else:
+            # 'download' covers the request up to the response headers; the
+            # body is streamed into the parser, so transfer time lands in 'parse'
+            with self._stage('download'):
+                response = http.get(self.vatsim_url, headers=headers, stream=True)
+            try:
+                if response.status_code == 304:
+                    self.feed_stats['skipped_not_modified'] += 1
+                    return None
+                response.raise_for_status()
+                response.raw.decode_content = True
+                with self._stage('parse'):
+                    if self.recorder:
+                        body = self.recorder.tee(response.raw)
+                        try:
+                            data = self._parse_feed(body, known_timestamp)
+                        except Exception:
+                            self.recorder.finish(body, keep=False)
+                            raise
+                        self.recorder.finish(body, keep=data is not None)
+                    else:
+                        data = self._parse_feed(response.raw, known_timestamp)
+            finally:
+                response.close()
+
+        update_timestamp = data['general'].get('update_timestamp') if data else known_timestamp
+        if data is None or (known_timestamp and update_timestamp == known_timestamp):
+            self.feed_stats['skipped_unchanged'] += 1
+            return None
+
+        # Only promoted to _feed_validators once the snapshot has loaded
+        self._pending_validators = {
+            'etag': response.headers.get('ETag') if response else None,
+            'last_modified': response.headers.get('Last-Modified') if response else None,
+            'update_timestamp': update_timestamp,
+        }
+        return data
+
+    def _parse_feed(self, fileobj, known_timestamp):
+        """
+        Parse a feed body from a binary file object into the trimmed snapshot
+        form. Returns None if general.update_timestamp equals known_timestamp.
+        """
+        if IJSON_AVAILABLE and self.stream_feed:
+            return _stream_feed(fileobj, known_timestamp)
+        body = fileobj.read()
+        if IJSON_AVAILABLE and known_timestamp:
+            # 'general' leads the feed, so this stops after a few hundred bytes
+            update_timestamp = next(ijson.items(body, 'general.update_timestamp'), None)
+            if update_timestamp == known_timestamp:
+                return None
+        raw = decode_json(body)
+        data = {
+            'general': raw.get('general') or {},
+            'pilots': [_trim_pilot(p) for p in raw.get('pilots', [])],
+            'controllers': [_trim_controller(c) for c in raw.get('controllers', [])],
+        }
+        del raw
+        return data
+
+    def _stage(self, name):
+        """Time a block as an update-cycle stage when metrics are attached."""
+        return self.metrics.stage(name) if self.metrics else nullcontext()
+
+    def enable_replay(self, replayer):
+        """Serve the feed from a FeedReplayer instead of the network."""
+        self.replayer = replayer
+        self.vatsim_url = replayer.url
+        self._feed_validators = {}
+
+    def _index_pilots(self, pilots):
+        """
+        Index pilots with a flight plan by departure and arrival ICAO.
+        Returns: dict of {icao: {'DEP': [pilot, ...], 'ARR': [pilot, ...]}}
+        """
+        index = {}
+        for pilot in pilots:
+            fp = pilot.get('flight_plan')
+            if not fp: continue
+            dep, arr = fp.get('departure'), fp.get('arrival')
+            if dep:
+                index.setdefault(dep, {'DEP': [], 'ARR': []})['DEP'].append(pilot)
+            if arr:
+                index.setdefault(arr, {'DEP': [], 'ARR': []})['ARR'].append(pilot)
+        return index
+
+    def _load_snapshot(self, data):
+        """
+        Keep a parsed feed in memory as the current snapshot: the airport
+        pilot index, the raw controller list and the global tracking views.
+        """
+        controllers = data.get('controllers', [])
+        previous = self.snapshot
+        self.snapshot = {
+            'version': previous['version'] + 1 if previous else 1,
+            'index': self._index_pilots(data.get('pilots', [])),
+            'controllers': controllers,
+        }
+
+        # Store global controller + pilot snapshots for tracking API
+        new_controllers = []
+        for c in controllers:
+            cs = c.get('callsign', '')
+            if not cs or cs.endswith('_ATIS'):
+                continue
+            boundary_id = self._boundary_id(cs)
+            # Estimate controller position: try ICAO prefix, then boundary root
+            icao = cs.split('_')[0].upper()
+            coords = self.airport_coords.get(icao)
+            if not coords:
+                # boundary_id may be like 'EGTT-S' — try the root part
+                root = boundary_id.split('-')[0]
+                coords = self.airport_coords.get(root)
+            lat, lon = coords if coords else (None, None)
+            new_controllers.append({
+                'callsign':    cs,
+                'frequency':   c.get('frequency', ''),
+                'position':    cs.split('_')[-1],
+                'boundary_id': boundary_id,
+                'lat':         lat,
+                'lon':         lon,
+            })
+        self.all_controllers = new_controllers
+
+        all_pilots = {}
+        for pilot in data.get('pilots', []):
+            cs = pilot.get('callsign')
+            fp = pilot.get('flight_plan') or {}
+            if cs and pilot.get('latitude') is not None:
+                all_pilots[cs] = {
+                    'callsign': cs,
+                    'latitude': pilot['latitude'],
+                    'longitude': pilot['longitude'],
+                    'heading': pilot.get('heading', 0),
+                    'groundspeed': pilot.get('groundspeed', 0),
+                    'altitude': pilot.get('altitude', 0),
+                    'origin': fp.get('departure', ''),
+                    'destination': fp.get('arrival', ''),
+                    'route': fp.get('route', ''),
+                    'status': 'En Route',
+                    'status_raw': 'En Route',
+                    'direction': 'ARR',
+                }
+        self.all_pilots = all_pilots
+
+        # Forget sticky stands of callsigns that have left the feed
+        online = {p.get('callsign') for p in data.get('pilots', [])}
+        # Copied first: join/search handlers may add entries from other threads
+        self._stand_cache = {k: v for k, v in list(self._stand_cache.items()) if k[0] in online}
+
+        self._feed_validators = self._pending_validators
+        self.feed_stats['last_update_timestamp'] = self._feed_validators.get('update_timestamp')
+
+    def _empty_board(self, info):
+        return {
+            'departures': [], 'arrivals': [], 'metar': 'Unavailable', 
+            'controllers': [], 'airport_name': info['name'],
+            'has_stands': info.get('has_stands', False), 'country': info.get('country', ''),
+            'stand_occupancy': {}
+        }
+
+    def _build_board(self, code, info, snapshot):
+        """Build one airport's board from an in-memory snapshot."""
+        board = self._empty_board(info)
+        pilots = snapshot['index'].get(code, {})
+        departures, arrivals = pilots.get('DEP', []), pilots.get('ARR', [])
+
+        # Geofence the whole airport up front instead of per flight
+        stand_matches = None
+        if info.get('has_stands', False):
+            stand_matches = self.match_stands(code, departures + arrivals)
+
+        for pilot in departures:
+            self.process_flight(pilot, code, 'DEP', board, info, stand_matches)
+        for pilot in arrivals:
+            self.process_flight(pilot, code, 'ARR', board, info, stand_matches)
+
+        # Recorded even when no pilot matched, so stands empty out
+        if stand_matches is not None:
+            board['stand_occupancy'] = self._record_occupancy(code, departures + arrivals, stand_matches, snapshot['version'])
+
+        # Use smart sorting for both lists
+        board['departures'].sort(key=lambda x: self._get_sortable_time(x.get('time_display', '')))
+        board['arrivals'].sort(key=self._arrival_sort_key)
+
+        board['metar'] = self.metar_fetcher.get_cached(code)
+        with self._stage('controllers'):
+            board['controllers'] = self.get_controllers(snapshot['controllers'], code)
+        self.board_built[code] = (snapshot['version'], time.time())
+        return board
+
+    def resolve_airports(self, extra_airports=None):
+        """
+        Returns: dict of {icao: airport_info} for every configured airport
+        plus any extra (dynamic) airports that have coordinates.
+        """
+        airport_infos = {}
+        requested = list(self.configured_airports) + [c.upper() for c in (extra_airports or [])]
+        for code in requested:
+            if code in airport_infos: continue
             info = self.get_airport_info(code)
             if info and info['lat'] is not None:
-                results[code] = {
-                    'departures': [], 'arrivals': [], 'metar': 'Unavailable', 
-                    'controllers': [], 'airport_name': info['name'],
-                    'has_stands': info.get('has_stands', False), 'country': info.get('country', '')
-                }
+                airport_infos[code] = info
+        return airport_infos
 
+    def refresh_snapshot(self):
+        """
+        Download the VATSIM feed and load it as the current snapshot.
+        Returns True if a new snapshot was loaded, False if the feed was unchanged.
+        """
+        self.feed_stats['cycles'] += 1
         try:
-            response = requests.get(self.vatsim_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            for pilot in data.get('pilots', []):
-                fp = pilot.get('flight_plan')
-                if not fp: continue
-                dep, arr = fp.get('departure'), fp.get('arrival')
-                
-                if dep in results:
-                    info = self.get_airport_info(dep)
-                    self.process_flight(pilot, dep, 'DEP', results[dep], info)
-                if arr in results:
-                    info = self.get_airport_info(arr)
-                    self.process_flight(pilot, arr, 'ARR', results[arr], info)
-
-            for code in results:
-                # Use smart sorting for both lists
-                results[code]['departures'].sort(key=lambda x: self._get_sortable_time(x.get('time_display', '')))
-                results[code]['arrivals'].sort(key=self._arrival_sort_key)
-                
-                results[code]['metar'] = self.get_metar(code)
-                results[code]['controllers'] = self.get_controllers(data.get('controllers', []), code)
-            
-            # Store global controller + pilot snapshots for tracking API
-            new_controllers = []
-            for c in data.get('controllers', []):
-                cs = c.get('callsign', '')
-                if not cs or cs.endswith('_ATIS'):
-                    continue
-                boundary_id = self._boundary_id(cs)
-                # Estimate controller position: try ICAO prefix, then boundary root
-                icao = cs.split('_')[0].upper()
-                coords = self.airport_coords.get(icao)
-                if not coords:
-                    # boundary_id may be like 'EGTT-S' — try the root part
-                    root = boundary_id.split('-')[0]
-                    coords = self.airport_coords.get(root)
-                lat, lon = coords if coords else (None, None)
-                new_controllers.append({
-                    'callsign':    cs,
-                    'frequency':   c.get('frequency', ''),
-                    'position':    cs.split('_')[-1],
-                    'boundary_id': boundary_id,
-                    'lat':         lat,
-                    'lon':         lon,
-                })
-            self.all_controllers = new_controllers
-            self.all_pilots = {}
-            for pilot in data.get('pilots', []):
-                cs = pilot.get('callsign')
-                fp = pilot.get('flight_plan') or {}
-                if cs and pilot.get('latitude') is not None:
-                    self.all_pilots[cs] = {
-                        'callsign': cs,
-                        'latitude': pilot['latitude'],
-                        'longitude': pilot['longitude'],
-                        'heading': pilot.get('heading', 0),
-                        'groundspeed': pilot.get('groundspeed', 0),
-                        'altitude': pilot.get('altitude', 0),
-                        'origin': fp.get('departure', ''),
-                        'destination': fp.get('arrival', ''),
-                        'route': fp.get('route', ''),
-                        'status': 'En Route',
-                        'status_raw': 'En Route',
-                        'direction': 'ARR',
-                    }
-
-            # Prune _dep_times of callsigns no longer appearing as Departing on any board
-            active_dep = set()
-            for airport_result in results.values():
-                for f in airport_result.get('departures', []):
-                    if f.get('actual_dep_time'):
-                        active_dep.add(f['callsign'])
-            self._dep_times = {k: v for k, v in self._dep_times.items() if k in active_dep}
-
-            # Prune _arr_times of callsigns no longer appearing as Landed on any board
-            active_arr = set()
-            for airport_result in results.values():
-                for f in airport_result.get('arrivals', []):
-                    if f.get('actual_arr_time'):
-                        active_arr.add(f['callsign'])
-            self._arr_times = {k: v for k, v in self._arr_times.items() if k in active_arr}
-
-            return results
-        except Exception as e:
-            print(f"Error: {e}")
-            traceback.print_exc()
-            return results
+            data = self._download_feed()
+        except Exception:
+            self.feed_stats['errors'] += 1
+            raise
+        if data is None:
+            return False
+        with self._stage('snapshot'):
+            self._load_snapshot(data)
+        self.feed_stats['processed'] += 1
+        return True
+
+    def has_new_snapshot(self):
+        """True if a snapshot has loaded since boards were last built."""
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot['version'] != self.built_version
+
+    def build_boards(self, airport_infos, retained=()):
+        """
+        Build boards for airport_infos from the current snapshot using only
+        in-memory data (cached METARs, UKCP assignments), then prune the
+        actual departure/arrival time caches. retained lists airports that
+        were skipped this time but whose last boards are still being served,
+        so their actual times are kept.
+        """
+        snapshot = self.snapshot
+        results = {}
+        for code, info in airport_infos.items():
+            start = time.perf_counter()
+            results[code] = self._build_board(code, info, snapshot)
+            if self.metrics:
+                self.metrics.record_airport(code, (time.perf_counter() - start) * 1000.0)
+        self.built_version = snapshot['version']
+
+        for code, airport_result in results.items():
+            self._timed_callsigns[code] = (
+                {f['callsign'] for f in airport_result.get('departures', []) if f.get('actual_dep_time')},
+                {f['callsign'] for f in airport_result.get('arrivals', []) if f.get('actual_arr_time')},
+            )
+        retained = set(retained)
+        self._timed_callsigns = {code: callsigns for code, callsigns in self._timed_callsigns.items()
+                                 if code in results or code in retained}
+
+        # Prune _dep_times of callsigns no longer appearing as Departing on any board
+        active_dep = set().union(*(dep for dep, _ in self._timed_callsigns.values()))
+        self._dep_times = {k: v for k, v in self._dep_times.items() if k in active_dep}
+
+        # Prune _arr_times of callsigns no longer appearing as Landed on any board
+        active_arr = set().union(*(arr for _, arr in self._timed_callsigns.values()))
+        self._arr_times = {k: v for k, v in self._arr_times.items() if k in active_arr}
+
+        return results
 
     def fetch_single_airport(self, airport_code):
+        """
+        Build a board for one airport from the latest snapshot. The feed is
+        only downloaded if no snapshot has been loaded yet; the METAR is the
+        cached one, refreshed by the next update cycle.
+        """
         airport_code = airport_code.upper()
         info = self.get_airport_info(airport_code)
         if not info or info['lat'] is None: return None
-        
-        result = {
-            'departures': [], 'arrivals': [], 'metar': 'Unavailable', 
-            'controllers': [], 'airport_name': info['name'],
-            'has_stands': info.get('has_stands', False), 'country': info.get('country', '')
-        }
 
         try:
-            response = requests.get(self.vatsim_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            for pilot in data.get('pilots', []):
-                fp = pilot.get('flight_plan')
-                if not fp: continue
-                dep, arr = fp.get('departure'), fp.get('arrival')
-                
-                if dep == airport_code: self.process_flight(pilot, airport_code, 'DEP', result, info)
-                if arr == airport_code: self.process_flight(pilot, airport_code, 'ARR', result, info)
-
-            # Use smart sorting for both lists
-            result['departures'].sort(key=lambda x: self._get_sortable_time(x.get('time_display', '')))
-            result['arrivals'].sort(key=self._arrival_sort_key)
-            
-            result['metar'] = self.get_metar(airport_code)
-            result['controllers'] = self.get_controllers(data.get('controllers', []), airport_code)
-            return {airport_code: result}
+            if self.snapshot is None:
+                self._load_snapshot(self._download_feed(conditional=False))
+            return {airport_code: self._build_board(airport_code, info, self.snapshot)}
         except Exception as e:
             print(f"Error fetching {airport_code}: {e}")
             traceback.print_exc()
@@ -463,9 +830,11 @@ class VatsimFetcher:
 
     def fetch_osm_stands_live(self, icao):
         """
-        Live fallback to OSM for stand data if not in stands.json.
-        Maintains stands.json as primary source.
+        Live fallback to OSM for stand data if not in static/stands/.
+        Maintains static/stands/ as primary source.
         Uses Overpass API to query parking positions.
+
+        Returns: list of stands ([] if OSM has none), or None if the query failed
         """
         # Overpass QL query to find parking positions within a specific aerodrome area
         query = f"""
@@ -478,7 +847,7 @@ class VatsimFetcher:
         """
         print(f"[OSM] Querying Overpass API for parking positions at {icao}")
         try:
-            resp = requests.post("https://overpass-api.de/api/interpreter", data={"data": query}, timeout=15)
+            resp = http.post("https://overpass-api.de/api/interpreter", data={"data": query})
             print(f"[OSM] Overpass API response status: {resp.status_code}")
             
             if resp.status_code == 200:
@@ -515,11 +884,52 @@ class VatsimFetcher:
         except Exception as e:
             print(f"[OSM] Exception during OSM fetch for {icao}: {e}")
             traceback.print_exc()
-        return []
+        return None
 
-    def process_flight(self, pilot, airport_code, direction, airport_data, airport_info):
+    def _in_box(self, pilot, airport_info, radius_km):
+        """
+        Cheap lat/lon box test: False only if the pilot is certainly more
+        than radius_km (great-circle) from the airport.
+        """
+        lat, lon = pilot['latitude'], pilot['longitude']
+        if lat is None or lon is None: return False
+        key = (airport_info['lat'], airport_info['lon'], radius_km)
+        box = self._box_cache.get(key)
+        if box is None:
+            angle = radius_km / 6371.0
+            dlat = math.degrees(angle)
+            # Widest longitude reach of the circle (wider than radius/cos(lat))
+            ratio = math.sin(angle) / math.cos(math.radians(airport_info['lat']))
+            dlon = math.degrees(math.asin(ratio)) if ratio < 1 else 180.0
+            box = self._box_cache[key] = (dlat, dlon)
+        if abs(lat - airport_info['lat']) > box[0]: return False
+        dlon = abs(lon - airport_info['lon'])
+        return min(dlon, 360.0 - dlon) <= box[1]
+
+    def _display_range(self, pilot, direction, airport_info):
+        """
+        Distance (km) within which process_flight() would show this flight,
+        mirroring determine_status() and the display rules. 0 = never shown,
+        inf = shown at any distance.
+        """
+        alt, gs = pilot['altitude'], pilot['groundspeed']
+        if direction == 'DEP':
+            # At or above the ceiling is 'En Route', which departures never show
+            if alt >= airport_info['ceiling']: return 0
+            return self.ground_range if gs < 45 else self.cleanup_dist_dep
+        # Low and slow arrivals outside landed_range are 'Scheduled'
+        if alt < 2000 and gs < 40: return self.landed_range
+        return float('inf')
+
+    def process_flight(self, pilot, airport_code, direction, airport_data, airport_info, stand_matches=None):
+        # Prefilter: only build the flight dict for rows that will be displayed
+        limit = self._display_range(pilot, direction, airport_info)
+        if not limit: return
+        if limit != float('inf') and not self._in_box(pilot, airport_info, limit): return
         dist_km = self.calculate_distance_m(pilot['latitude'], pilot['longitude'], airport_info['lat'], airport_info['lon']) / 1000.0
-        flight_info = self.format_flight(pilot, direction, airport_info['ceiling'], airport_code, dist_km, airport_info.get('has_stands', False))
+        if dist_km >= limit: return
+
+        flight_info = self.format_flight(pilot, direction, airport_info['ceiling'], airport_code, dist_km, airport_info.get('has_stands', False), stand_matches)
         status = flight_info['status_raw']
         
         if direction == 'DEP':
@@ -551,7 +961,7 @@ class VatsimFetcher:
     def calculate_delay(self, scheduled_time, logon_time_str):
         if not scheduled_time or len(scheduled_time) < 4: return 0
         try:
-            now = datetime.utcnow()
+            now = clock.utcnow()
             sched_hour = int(scheduled_time[:2])
             sched_min = int(scheduled_time[2:4])
             sched_dt = now.replace(hour=sched_hour, minute=sched_min, second=0, microsecond=0)
@@ -571,7 +981,7 @@ class VatsimFetcher:
             if not deptime or not enroute_time or groundspeed < 50: 
                 return None
             
-            now = datetime.utcnow()
+            now = clock.utcnow()
             
             # 1. Parse Departure Time
             if len(deptime) != 4 or not deptime.isdigit(): return None
@@ -629,7 +1039,7 @@ class VatsimFetcher:
         """
         return self.checkin_system.get_checkin_desk(callsign, airport_code)
 
-    def format_flight(self, pilot, direction, ceiling, airport_code, dist_km, has_stands):
+    def format_flight(self, pilot, direction, ceiling, airport_code, dist_km, has_stands, stand_matches=None):
         fp = pilot.get('flight_plan', {})
         callsign = pilot.get('callsign', 'N/A')
         
@@ -638,7 +1048,7 @@ class VatsimFetcher:
 
         gate = None
         if has_stands:
-            gate = self.find_stand(pilot['latitude'], pilot['longitude'], airport_code, pilot['groundspeed'], pilot['altitude'], callsign)
+            gate = self.find_stand(pilot['latitude'], pilot['longitude'], airport_code, pilot['groundspeed'], pilot['altitude'], callsign, stand_matches)
 
         raw_status = self.determine_status(pilot, direction, ceiling, dist_km, gate, airport_code)
         
@@ -668,14 +1078,14 @@ class VatsimFetcher:
         if direction == 'DEP' and raw_status == 'Departing':
             key = callsign
             if key not in self._dep_times:
-                self._dep_times[key] = datetime.utcnow().strftime('%H:%M')
+                self._dep_times[key] = clock.utcnow().strftime('%H:%M')
             actual_dep_time = self._dep_times[key]
 
         actual_arr_time = None
         if direction == 'ARR' and raw_status == 'Landed':
             key = callsign
             if key not in self._arr_times:
-                self._arr_times[key] = datetime.utcnow().strftime('%H:%M')
+                self._arr_times[key] = clock.utcnow().strftime('%H:%M')
             actual_arr_time = self._arr_times[key]
 
         gate_display = gate or 'TBA'
@@ -699,7 +1109,8 @@ class VatsimFetcher:
                     airport_code, 
                     pilot['groundspeed'], 
                     pilot['altitude'], 
-                    callsign=None  # <--- This is the secret key! Forces geofencing.
+                    callsign=None,  # <--- This is the secret key! Forces geofencing.
+                    stand_matches=stand_matches
                 )
                 
                 # If they are at a valid stand in our database, override the API assignment
@@ -728,7 +1139,7 @@ class VatsimFetcher:
             if alt < ceiling: 
                 minutes_online = 0
                 if pilot.get('logon_time'):
-                    try: minutes_online = (datetime.utcnow() - datetime.fromisoformat(pilot['logon_time'][:19])).total_seconds() / 60
+                    try: minutes_online = (clock.utcnow() - datetime.fromisoformat(pilot['logon_time'][:19])).total_seconds() / 60
                     except: pass
                 
                 neutral_squawks = {'2000', '2200', '1200', '7000', '0000'}
@@ -752,15 +1163,11 @@ class VatsimFetcher:
                 else: return 'Departing'
             else: return 'En Route'
         else:
-            if alt < 2000 and gs < 40: return 'Landed' if dist_km < 50 else 'Scheduled'
+            if alt < 2000 and gs < 40: return 'Landed' if dist_km < self.landed_range else 'Scheduled'
             elif alt < 4000 and dist_km < 25: return 'Landing'
             elif dist_km < 250: return 'Approaching'
             else: return 'En Route'
 
-    def get_metar(self, code):
-        try: return requests.get(f'https://metar.vatsim.net/{code}', timeout=2).text.strip()
-        except: return 'Unavailable'
-
     def _callsign_prefix(self, callsign):
         """Strip position suffix (last _XXX) to get the VATSpy callsign prefix."""
         return callsign.rsplit('_', 1)[0] if '_' in callsign else callsign